@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 # This is from https://neon.com/docs/guides/django Add these at the top of your settings.py
 from os import getenv
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 import os
 from pathlib import Path
 
@@ -53,6 +54,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'booking.middleware.CompressionMiddleware',
+    'booking.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -96,7 +99,47 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "OPTIONS": {
             'sslmode': 'require',  # Important for Neon
-        }
+        } if "postgresql" in (os.getenv("DB_ENGINE") or "postgresql") else {}
+    }
+}
+
+# Optional read replica for listing/catalog reads (see booking/db_routers.py).
+# Set DB_REPLICA_HOST or DB_REPLICA_NAME; any other DB_REPLICA_* left unset
+# falls back to the primary's value. Without them everything uses "default".
+if os.getenv("DB_REPLICA_HOST") or os.getenv("DB_REPLICA_NAME"):
+    DATABASES["replica"] = {
+        key: os.getenv(f"DB_REPLICA_{key}", DATABASES["default"][key])
+        for key in ("ENGINE", "HOST", "PORT", "NAME", "USER", "PASSWORD")
+    }
+    DATABASES["replica"]["OPTIONS"] = DATABASES["default"]["OPTIONS"]
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+
+DATABASE_ROUTERS = ["booking.db_routers.ReplicaRouter"]
+
+# Seconds a client keeps reading from the primary after it wrote something.
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "5"))
+
+# Sessions and messages
+# SESSION_STRATEGY: "db" (session row per request), "cached_db" (sessions read
+# through the local cache below, written through to the DB) or "signed_cookies"
+# (no session table at all). Flash messages always live in their own cookie so
+# they never force a session write.
+SESSION_STRATEGY = os.getenv("SESSION_STRATEGY", "db")
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+if SESSION_STRATEGY not in SESSION_ENGINES:
+    raise ImproperlyConfigured(
+        f"SESSION_STRATEGY must be one of {', '.join(SESSION_ENGINES)}, not {SESSION_STRATEGY!r}."
+    )
+SESSION_ENGINE = SESSION_ENGINES[SESSION_STRATEGY]
+MESSAGE_STORAGE = "django.contrib.messages.storage.cookie.CookieStorage"
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
 
@@ -128,6 +171,31 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# PASSWORD_HASHER_POLICY picks the hasher for new hashes ("pbkdf2" or "argon2").
+# Hashes made with another policy or cost are upgraded on the next successful
+# login, both for the HTML login and /api/token/.
+# Use `python manage.py benchmark_hashers` to compare logins/sec/core.
+PASSWORD_HASHER_POLICY = os.getenv("PASSWORD_HASHER_POLICY", "pbkdf2")
+PBKDF2_ITERATIONS = int(os.getenv("PBKDF2_ITERATIONS", "1000000"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "102400"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "8"))
+
+PASSWORD_HASHER_POLICIES = {
+    "pbkdf2": "booking.hashers.TunedPBKDF2PasswordHasher",
+    "argon2": "booking.hashers.TunedArgon2PasswordHasher",
+}
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_POLICIES[PASSWORD_HASHER_POLICY]] + [
+    hasher for policy, hasher in PASSWORD_HASHER_POLICIES.items()
+    if policy != PASSWORD_HASHER_POLICY
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -176,6 +244,53 @@ REST_FRAMEWORK = {
 }
 
 
+# Bulk user import (manage.py import_users and /api/users/bulk/)
+USER_IMPORT_CHUNK_SIZE = int(os.getenv("USER_IMPORT_CHUNK_SIZE", "500"))
+USER_IMPORT_HASH_WORKERS = int(os.getenv("USER_IMPORT_HASH_WORKERS", "1"))
+
+# Lifetime of a tentative hold from /api/reservations/hold/
+RESERVATION_HOLD_SECONDS = int(os.getenv("RESERVATION_HOLD_SECONDS", "300"))
+
+# Page size for /api/reservations/changes/ (delta sync)
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "500"))
+
+# Max sub-requests per /api/batch/ call
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "10"))
+
+# Max meetings per /api/reservations/allocate/ call
+ALLOCATE_MAX_REQUESTS = int(os.getenv("ALLOCATE_MAX_REQUESTS", "2000"))
+
+# Seconds a superseded availability file is kept after publish_availability
+# replaces it; must exceed manifest.json's max-age in vercel.json (60s) plus
+# the deploy time, or clients holding the old manifest get 404s
+AVAILABILITY_RETAIN_SECONDS = int(os.getenv("AVAILABILITY_RETAIN_SECONDS", "600"))
+
+# Seconds before the in-memory room search index (non-Postgres ?q=) is rebuilt
+ROOM_SEARCH_INDEX_TTL = int(os.getenv("ROOM_SEARCH_INDEX_TTL", "60"))
+
+# Rows per transaction when deleting a room's or user's reservations
+CASCADE_BATCH_SIZE = int(os.getenv("CASCADE_BATCH_SIZE", "2000"))
+
+# Max results from the user/room autocomplete lookups
+AUTOCOMPLETE_LIMIT = int(os.getenv("AUTOCOMPLETE_LIMIT", "20"))
+
+# Shared secret for /healthz (X-Healthz-Token header or ?token=): unlocks
+# error details and ?force=1 for probes; staff get them when logged in
+HEALTHZ_TOKEN = os.getenv("HEALTHZ_TOKEN", "")
+
+
+# Response compression (booking.middleware.CompressionMiddleware).
+# Brotli is used when the `brotli` package is installed; gzip otherwise.
+# Compare codecs with `python manage.py benchmark_compression`.
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_STREAM_CHUNK = int(os.getenv("COMPRESSION_STREAM_CHUNK", "16384"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_EXCLUDED_TYPES = [
+    "image/", "video/", "audio/", "font/woff",
+    "application/zip", "application/gzip", "application/x-gzip", "application/pdf",
+]
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -33,6 +33,9 @@ urlpatterns = [
     # REST API endpoints (Django REST Framework + JWT)
     path("api/", include("booking.api_urls")),
 
+    # Readiness/warmup probe (per-stage cold start timings)
+    path("healthz", views.healthz, name="healthz"),
+
     # Django admin
     path("admin/", admin.site.urls),
 ]
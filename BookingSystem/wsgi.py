@@ -15,5 +15,12 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BookingSystem.settings')
 
 application = get_wsgi_application()
 
+# Warm the DB connection, URL resolver and templates at cold start instead of
+# on the first request (see booking/warmup.py and /healthz).
+if os.getenv("WARMUP_ON_START", "").lower() in ("1", "true", "yes"):
+    from booking.warmup import warmup
+
+    warmup()
+
 # For Vercel
 app = application
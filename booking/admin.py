@@ -1,9 +1,24 @@
 from django.contrib import admin
-from .models import Profile, Room, Reservation
+from django.db import transaction
+
+from .events import record_event, record_update, snapshot
+from .models import Profile, Room, Reservation, ReservationArchive
 
 admin.site.register(Profile)
 admin.site.register(Room)
-admin.site.register(Reservation)
-from django.contrib import admin
+admin.site.register(ReservationArchive)
+
+
+@admin.register(Reservation)
+class ReservationAdmin(admin.ModelAdmin):
+    """Admin adds and edits write their event like the views do (deletes go through the post_delete signal)."""
 
-# Register your models here.
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            if change:
+                previous = snapshot(Reservation.objects.select_for_update().get(pk=obj.pk))
+                obj.save()
+                record_update(obj, previous)
+            else:
+                obj.save()
+                record_event(obj, "created")
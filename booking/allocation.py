@@ -0,0 +1,174 @@
+# booking/allocation.py
+
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from .models import Reservation, Room
+from .utils import parse_facilities
+
+# How many already-placed requests one request may push to another room
+MAX_DISPLACEMENT_DEPTH = 2
+
+# Conflict checks the displacement search may spend per allocate() call;
+# once used up, the remaining requests only get directly free rooms
+DISPLACEMENT_BUDGET = 200_000
+
+# Owner of intervals taken by bookings that already exist
+EXISTING = -1
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+class RoomSchedule:
+    """
+    Busy intervals per (room, date) as sorted, non-overlapping
+    (start, end, owner) tuples in minutes; owner is EXISTING or the index
+    of the batch request placed there.
+    """
+
+    def __init__(self, existing):
+        # Merge existing bookings first: the table may hold overlapping ones
+        by_slot = defaultdict(list)
+        for room_id, day, start, end in existing:
+            by_slot[room_id, day].append((start, end))
+        self.slots = defaultdict(list)
+        for key, intervals in by_slot.items():
+            merged = self.slots[key]
+            for start, end in sorted(intervals):
+                if merged and start < merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], end), EXISTING)
+                else:
+                    merged.append((start, end, EXISTING))
+
+    def conflicts(self, room_id, day, start, end):
+        slots = self.slots[room_id, day]
+        i = bisect_left(slots, (start,))
+        if i and slots[i - 1][1] > start:
+            i -= 1
+        found = []
+        while i < len(slots) and slots[i][0] < end:
+            found.append(slots[i])
+            i += 1
+        return found
+
+    def add(self, room_id, day, start, end, owner):
+        insort(self.slots[room_id, day], (start, end, owner))
+
+    def remove(self, room_id, day, start, end, owner):
+        self.slots[room_id, day].remove((start, end, owner))
+
+
+def allocate(requests):
+    """
+    Proposes a room for each request (dicts with date, start_time, end_time,
+    attendees and optional room_type/facilities/id) without writing anything.
+
+    Candidate rooms must fit the headcount, type and facilities; they are
+    tried smallest first so wasted seats stay low. Requests are placed most
+    constrained first (fewest candidates, then largest), avoiding existing
+    confirmed bookings and live holds. When every candidate is taken, a
+    request may move one already-placed request to another of its rooms
+    (up to MAX_DISPLACEMENT_DEPTH moves deep, within DISPLACEMENT_BUDGET
+    conflict checks per call) before it is left unassigned.
+
+    Returns {"assignments": [...], "unassigned": [...], "wasted_seats": n}.
+    """
+    rooms = list(Room.objects.only("room_id", "capacity", "room_type", "facilities"))
+    room_tags = {room.room_id: parse_facilities(room.facilities) for room in rooms}
+    rooms.sort(key=lambda room: (room.capacity, room.room_id))
+
+    existing = (
+        Reservation.objects.blocking()
+        .filter(date__in={request["date"] for request in requests})
+        .values_list("room_id", "date", "start_time", "end_time")
+    )
+    schedule = RoomSchedule(
+        (room_id, day, _minutes(start), _minutes(end))
+        for room_id, day, start, end in existing.iterator(chunk_size=2000)
+    )
+
+    spans, candidates = [], []
+    for request in requests:
+        spans.append((request["date"], _minutes(request["start_time"]), _minutes(request["end_time"])))
+        wanted = parse_facilities(request.get("facilities") or [])
+        candidates.append([
+            room for room in rooms
+            if room.capacity >= request["attendees"]
+            and request.get("room_type") in (None, "", room.room_type)
+            and wanted <= room_tags[room.room_id]
+        ])
+
+    placed = {}  # request index -> Room
+    # (request, depth) searches that found nothing. Placing a request in a
+    # free room only adds an interval, which can't make them succeed, so
+    # they stay valid until a displacement actually moves something.
+    failed = set()
+    budget = [DISPLACEMENT_BUDGET]
+
+    def assign(i, room):
+        placed[i] = room
+        schedule.add(room.room_id, *spans[i], owner=i)
+
+    def unassign(i):
+        room = placed.pop(i)
+        schedule.remove(room.room_id, *spans[i], owner=i)
+        return room
+
+    def place(i, depth, moving):
+        movable = []  # (room, the single batch request blocking it)
+        for room in candidates[i]:
+            blocking = schedule.conflicts(room.room_id, *spans[i])
+            if not blocking:
+                assign(i, room)
+                return True
+            if len(blocking) == 1 and blocking[0][2] != EXISTING and blocking[0][2] not in moving:
+                movable.append((room, blocking[0][2]))
+        if moving:
+            budget[0] -= len(candidates[i])
+        # Nothing in the slot can be freed, or the search is out of budget
+        if not depth or not movable or budget[0] <= 0 or (i, depth) in failed:
+            return False
+        for room, j in movable:
+            if (j, depth - 1) in failed:
+                continue
+            previous = unassign(j)
+            assign(i, room)
+            if place(j, depth - 1, moving | {i}):
+                failed.clear()
+                return True
+            failed.add((j, depth - 1))
+            unassign(i)
+            assign(j, previous)
+        failed.add((i, depth))
+        return False
+
+    order = sorted(
+        range(len(requests)),
+        key=lambda i: (len(candidates[i]), -requests[i]["attendees"], spans[i]),
+    )
+    unassigned = []
+    for i in order:
+        if not candidates[i]:
+            unassigned.append((i, "No room matches the headcount, type and facilities."))
+        elif not place(i, MAX_DISPLACEMENT_DEPTH, frozenset()):
+            unassigned.append((i, "Every matching room is booked at that time."))
+
+    assignments = [
+        {
+            "id": requests[i].get("id"),
+            "room": room.room_id,
+            "date": requests[i]["date"],
+            "start_time": requests[i]["start_time"],
+            "end_time": requests[i]["end_time"],
+            "attendees": requests[i]["attendees"],
+            "wasted_seats": room.capacity - requests[i]["attendees"],
+        }
+        for i, room in sorted(placed.items())
+    ]
+    return {
+        "assignments": assignments,
+        "unassigned": [{"id": requests[i].get("id"), "reason": reason} for i, reason in sorted(unassigned)],
+        "wasted_seats": sum(item["wasted_seats"] for item in assignments),
+    }
@@ -2,7 +2,10 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from .api_views import RoomViewSet, RegisterView, CurrentUserView, ReservationViewSet,UserViewSet
+from .api_views import (
+    RoomViewSet, RegisterView, CurrentUserView, ReservationViewSet,UserViewSet, BatchView,
+    room_calendar, user_calendar,
+)
 
 
 router = DefaultRouter()
@@ -20,6 +23,11 @@ urlpatterns = [
     # Signup
     path("register/", RegisterView.as_view(), name="register"),
     path("me/", CurrentUserView.as_view(), name="current_user"),
+    # Several GET calls in one round trip
+    path("batch/", BatchView.as_view(), name="api_batch"),
+    # iCalendar feeds (token in the URL); before the router's reservation routes
+    path("reservations/calendar/<str:token>.ics", user_calendar, name="user_calendar"),
+    path("reservations/calendar/<str:token>/rooms/<int:room_id>.ics", room_calendar, name="room_calendar"),
     # Rooms API
     path("", include(router.urls)),
 ]
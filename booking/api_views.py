@@ -1,20 +1,100 @@
+import codecs
+from datetime import date, timedelta
+
 from rest_framework import viewsets, permissions, status
+from rest_framework.authentication import BaseAuthentication
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import APIException, PermissionDenied, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, HttpRequest, QueryDict, StreamingHttpResponse
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import condition
+
+from .allocation import allocate
+from .archive import archive_horizon, reservations_between
+from .cascade import cancel_reservations, delete_with_reservations
+from .db_routers import ReplicaReadsMixin
+from .pagination import UserCursorPagination
+from .events import events_after, record_event, record_update, snapshot
+from .ical import feed_etag, feed_reservations, feed_with_etag_parts, render_calendar, room_with_etag_parts
+from .models import (
+    CalendarFeed, Room, Reservation, ReservationTombstone, StaleReservationError, start_of_day,
+)
+from .serializers import (
+    RoomSerializer, UserSerializer, ReservationSerializer, AdminUserSerializer,
+    ReservationRowSerializer, RoomRowSerializer, AllocationRequestSerializer,
+)
+from .provisioning import import_users
+from .renderers import ORJSONRenderer
+from .search import search_rooms
+from .sync import InvalidCursor, changes_since
+from .utils import parse_facilities, send_booking_email
+
+
+class FastListMixin:
+    """
+    Opt-in fast read path: `?fast=1` on list endpoints returns rows built by
+    `row_serializer_class` from .values_list() instead of the DRF serializer,
+    rendered by ORJSONRenderer. Writes and detail views keep the normal
+    serializer, validation and JSONRenderer.
+    """
+    row_serializer_class = None
+    fast_actions = ("list",)
+
+    def wants_fast_rows(self):
+        return self.action in self.fast_actions and self.request.query_params.get("fast") in ("1", "true")
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.wants_fast_rows():
+            return [ORJSONRenderer() if type(renderer) is JSONRenderer else renderer for renderer in renderers]
+        return renderers
 
-from .models import Room, Reservation
-from .serializers import RoomSerializer, UserSerializer, ReservationSerializer, AdminUserSerializer
-from .utils import send_booking_email
+    def list(self, request, *args, **kwargs):
+        if self.wants_fast_rows():
+            queryset = self.filter_queryset(self.get_queryset())
+            return Response(self.row_serializer_class(queryset).data)
+        return super().list(request, *args, **kwargs)
 
 
-class RoomViewSet(viewsets.ModelViewSet):
+class RoomViewSet(ReplicaReadsMixin, FastListMixin, viewsets.ModelViewSet):
+    """
+    GET /api/rooms/?facilities=projector,whiteboard&q=<text>&min_capacity=<n>&room_type=<type>
+    All filters are optional and combine (facilities: every tag must match).
+    """
     queryset = Room.objects.all().order_by("room_name")
     serializer_class = RoomSerializer
+    row_serializer_class = RoomRowSerializer
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action != "list":
+            return qs
+        params = self.request.query_params
+
+        min_capacity = params.get("min_capacity")
+        if min_capacity:
+            if not min_capacity.isdigit():
+                raise ValidationError({"min_capacity": "Expected a whole number."})
+            qs = qs.filter(capacity__gte=int(min_capacity))
+        room_type = params.get("room_type")
+        if room_type:
+            qs = qs.filter(room_type=room_type)
+
+        return search_rooms(qs, params.get("q", ""), parse_facilities(params.get("facilities", "")))
 
     def get_permissions(self):
         # Public can view rooms; mutation is admin-only
@@ -22,6 +102,21 @@ class RoomViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         return [IsAdminUser()]
 
+    @action(detail=True, methods=["post"], url_path="cancel-bookings")
+    def cancel_bookings(self, request, pk=None):
+        """
+        POST /api/rooms/<id>/cancel-bookings/  (staff)
+        Cancels the room's upcoming bookings in bulk (e.g. the room is closed
+        for maintenance) and emails each affected user one digest.
+        Returns {"reservations", "notified"}.
+        """
+        room = self.get_object()
+        result = cancel_reservations(
+            room.bookings.filter(date__gte=timezone.localdate()),
+            f"{room.room_name} is unavailable",
+        )
+        return Response(result)
+
 
 
 class RegisterView(APIView):
@@ -88,24 +183,169 @@ class CurrentUserView(APIView):
         serializer = UserSerializer(request.user)
         return Response(serializer.data)
 
-class ReservationViewSet(viewsets.ModelViewSet):
+
+class BatchAuthentication(BaseAuthentication):
+    """
+    Authenticates a /api/batch/ sub-request as the user the batch itself
+    authenticated. Only BatchView sets `batch_credentials`, on the
+    HttpRequest it builds; any other request falls through unauthenticated.
+    """
+
+    def authenticate(self, request):
+        return getattr(request._request, "batch_credentials", None)
+
+
+class BatchView(APIView):
+    """
+    POST /api/batch/
+    Body: {"requests": ["/api/me/", {"path": "/api/reservations/my/?from=2025-01-01"}]}
+    Runs several GET API calls in one round trip, reusing this request's
+    authenticated user (the token is decoded once). Returns
+    {"responses": [{"path", "status", "body"}, ...]} in request order.
+    Only DRF views can be batched (not the .ics feeds).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        items = request.data.get("requests") if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "Expected a non-empty list under 'requests'."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.BATCH_MAX_REQUESTS:
+            return Response({"detail": f"At most {settings.BATCH_MAX_REQUESTS} requests per batch."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        paths = [item.get("path") if isinstance(item, dict) else item for item in items]
+        if not all(isinstance(path, str) and path.startswith("/api/") for path in paths):
+            return Response({"detail": "Each request must be a GET path under /api/."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"responses": [self.run(request, path) for path in paths]})
+
+    def run(self, request, full_path):
+        path, _, query = full_path.partition("?")
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return {"path": full_path, "status": status.HTTP_404_NOT_FOUND, "body": {"detail": "Not found."}}
+        view_class = getattr(match.func, "cls", None)
+        if view_class is None:
+            return {"path": full_path, "status": status.HTTP_400_BAD_REQUEST,
+                    "body": {"detail": "Only JSON API endpoints can be batched."}}
+        if view_class is BatchView:
+            return {"path": full_path, "status": status.HTTP_400_BAD_REQUEST,
+                    "body": {"detail": "Batches cannot be nested."}}
+
+        sub = HttpRequest()
+        sub.method = "GET"
+        sub.path = sub.path_info = path
+        sub.META = {**request._request.META, "REQUEST_METHOD": "GET", "PATH_INFO": path,
+                    "QUERY_STRING": query}
+        sub.GET = QueryDict(query)
+        sub.COOKIES = request.COOKIES
+        sub.resolver_match = match
+        sub.batch_credentials = (request.user, request.auth)
+
+        # The same view, authenticated by BatchAuthentication only
+        initkwargs = {**match.func.initkwargs, "authentication_classes": [BatchAuthentication]}
+        actions = getattr(match.func, "actions", None)
+        view = view_class.as_view(actions, **initkwargs) if actions else view_class.as_view(**initkwargs)
+
+        response = view(sub, *match.args, **match.kwargs)
+        return {"path": full_path, "status": response.status_code, "body": getattr(response, "data", None)}
+
+class EditConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This reservation was changed by someone else. Reload it and try again."
+    default_code = "edit_conflict"
+
+
+class SlotTaken(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This room is already booked for the selected time range."
+    default_code = "slot_taken"
+
+
+def lock_slot(room_id, day, start_time, end_time, exclude=None):
+    """
+    Locks the room row (as /hold/ does) and raises SlotTaken if a confirmed
+    booking or live hold overlaps the slot. Call inside transaction.atomic().
+    """
+    Room.objects.select_for_update().get(pk=room_id)
+    if Reservation.objects.clashing(room_id, day, start_time, end_time, exclude=exclude).exists():
+        raise SlotTaken()
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "This reservation has changed since the version in If-Match."
+    default_code = "precondition_failed"
+
+
+def parse_if_match(header):
+    """Version number from an If-Match header ("3", W/"3"), or None for "*"."""
+    tag = header.split(",")[0].strip()
+    if tag == "*":
+        return None
+    try:
+        return int(tag.removeprefix("W/").strip('"'))
+    except ValueError:
+        raise PreconditionFailed()
+
+
+class ReservationViewSet(ReplicaReadsMixin, FastListMixin, viewsets.ModelViewSet):
     serializer_class = ReservationSerializer
+    row_serializer_class = ReservationRowSerializer
     permission_classes = [IsAuthenticated]
+    replica_actions = ("list", "retrieve", "my")
+    fast_actions = ("list", "my")
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_staff:
-            return (
-                Reservation.objects
-                .select_related("room", "user")
-                .order_by("date", "start_time")
-            )
-        return (
-            Reservation.objects
-            .select_related("room")
-            .filter(user=user)
-            .order_by("date", "start_time")
-        )
+        return self.filter_window(Reservation.objects.listing(None if user.is_staff else user))
+
+    def window(self):
+        """Optional ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive), as {"from": date, "to": date}."""
+        params = self.request.query_params
+        window = {}
+        for param in ("from", "to"):
+            if params.get(param):
+                value = parse_date(params[param])
+                if value is None:
+                    raise ValidationError({param: ["Enter a date in YYYY-MM-DD format."]})
+                window[param] = value
+        return window
+
+    def filter_window(self, qs):
+        """
+        The window() filter on starts_at/ends_at. A booking never spans more
+        than a day, so ?from= also bounds starts_at (as overlapping() does)
+        and stays a range scan on a starts_at index.
+        """
+        window = self.window()
+        if "from" in window:
+            day_start = start_of_day(window["from"])
+            qs = qs.filter(starts_at__gt=day_start - timedelta(days=1), ends_at__gt=day_start)
+        if "to" in window:
+            qs = qs.filter(starts_at__lt=start_of_day(window["to"] + timedelta(days=1)))
+        return qs
+
+    def archived_rows(self, **filters):
+        """
+        Listing rows from both the live and archive tables when ?from= reaches
+        back into archived dates (see archive.reservations_between), else None.
+        """
+        window = self.window()
+        horizon = archive_horizon() if "from" in window else None
+        if horizon is None or window["from"] > horizon:
+            return None
+        return reservations_between(window["from"], window.get("to", date.max), **filters)
+
+    def list(self, request, *args, **kwargs):
+        rows = self.archived_rows(**({} if request.user.is_staff else {"user_id": request.user.id}))
+        if rows is not None:
+            return Response(rows)
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -120,7 +360,11 @@ class ReservationViewSet(viewsets.ModelViewSet):
                 except User.DoesNotExist:
                     raise PermissionDenied("Selected user does not exist.")
 
-        reservation = serializer.save(user=target_user, status="Confirmed")
+        data = serializer.validated_data
+        with transaction.atomic():
+            lock_slot(data["room"].pk, data["date"], data["start_time"], data["end_time"])
+            reservation = serializer.save(user=target_user, status="Confirmed")
+            record_event(reservation, "created")
 
         # Email: confirmation
         subject = "Your Reservation Confirmation"
@@ -138,10 +382,26 @@ class ReservationViewSet(viewsets.ModelViewSet):
             context,
         )
 
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Single-reservation responses carry the version as their ETag
+        if self.detail and response.status_code < 300 and isinstance(response.data, dict) \
+                and "version" in response.data:
+            response["ETag"] = f'"{response.data["version"]}"'
+        return super().finalize_response(request, response, *args, **kwargs)
+
     def perform_update(self, serializer):
         user = self.request.user
-        reservation = self.get_object()
+        reservation = serializer.instance
         old_status = reservation.status
+        previous = snapshot(reservation)
+
+        if_match = self.request.headers.get("If-Match")
+        if if_match:
+            version = parse_if_match(if_match)
+            if version is not None:
+                if version != reservation.version:
+                    raise PreconditionFailed()
+                reservation.version = version
 
         # Only owner or admin
         if not user.is_staff and reservation.user != user:
@@ -158,7 +418,21 @@ class ReservationViewSet(viewsets.ModelViewSet):
                     serializer.validated_data.pop("status", None)
 
         # Admin: no extra restrictions
-        reservation = serializer.save()
+        data = serializer.validated_data
+        try:
+            with transaction.atomic():
+                if data.get("status", reservation.status) != "Cancelled":
+                    lock_slot(
+                        data.get("room", reservation.room).pk,
+                        data.get("date", reservation.date),
+                        data.get("start_time", reservation.start_time),
+                        data.get("end_time", reservation.end_time),
+                        exclude=reservation.pk,
+                    )
+                reservation = serializer.save()
+                record_update(reservation, previous)
+        except StaleReservationError:
+            raise PreconditionFailed() if if_match else EditConflict()
 
         # If now cancelled → send cancellation email
         if old_status != "Cancelled" and reservation.status == "Cancelled":
@@ -189,26 +463,247 @@ class ReservationViewSet(viewsets.ModelViewSet):
 
         return super().destroy(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        if_match = self.request.headers.get("If-Match")
+        version = parse_if_match(if_match) if if_match else None
+        with transaction.atomic():
+            # Lock the row so nobody can edit it between the check and the DELETE
+            if version is not None and not Reservation.objects.select_for_update().filter(
+                pk=instance.pk, version=version
+            ).exists():
+                raise PreconditionFailed()
+            instance.delete()
+
     @action(detail=False, methods=["get"])
     def my(self, request):
-        qs = (
-            Reservation.objects
-            .select_related("room")
-            .filter(user=request.user)
-            .order_by("date", "start_time")
-        )
+        rows = self.archived_rows(user_id=request.user.id)
+        if rows is not None:
+            return Response(rows)
+        qs = self.filter_window(Reservation.objects.listing(request.user))
+        if self.wants_fast_rows():
+            return Response(self.row_serializer_class(qs).data)
         serializer = self.get_serializer(qs, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["post"])
+    def hold(self, request):
+        """
+        POST /api/reservations/hold/  {room, date, start_time, end_time}
+        Reserves the slot for the caller as a Pending hold that expires after
+        RESERVATION_HOLD_SECONDS. Holds count in overlap checks, so a taken
+        slot is reported (409) before the user fills in the rest of the form.
+        """
+        data = request.data.copy()
+        data["user"] = request.user.pk
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            # Lock the room so concurrent holds for it are checked one at a time
+            room = Room.objects.select_for_update().get(pk=serializer.validated_data["room"].pk)
+            reservation = Reservation(
+                room=room,
+                user=request.user,
+                date=serializer.validated_data["date"],
+                start_time=serializer.validated_data["start_time"],
+                end_time=serializer.validated_data["end_time"],
+                status="Pending",
+                hold_expires_at=timezone.now() + timedelta(seconds=settings.RESERVATION_HOLD_SECONDS),
+            )
+            reservation.set_timestamps()
+            try:
+                reservation.full_clean()
+            except DjangoValidationError as exc:
+                return Response({"detail": exc.messages}, status=status.HTTP_409_CONFLICT)
+            reservation.save()
+            record_event(reservation, "held")
+
+        return Response(self.get_serializer(reservation).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser])
+    def allocate(self, request):
+        """
+        POST /api/reservations/allocate/  (staff)
+        {"requests": [{id, date, start_time, end_time, attendees, room_type?, facilities?}]}
+        Proposes a room per request (see booking/allocation.py). Nothing is booked.
+        """
+        requests = request.data.get("requests") if isinstance(request.data, dict) else None
+        if not isinstance(requests, list):
+            return Response({"detail": "Expected a list under 'requests'."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(requests) > settings.ALLOCATE_MAX_REQUESTS:
+            return Response({"detail": f"At most {settings.ALLOCATE_MAX_REQUESTS} requests per call."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = AllocationRequestSerializer(data=requests, many=True)
+        serializer.is_valid(raise_exception=True)
+        return Response(allocate(serializer.validated_data))
+
+    @action(detail=True, methods=["post"])
+    def confirm(self, request, pk=None):
+        """
+        POST /api/reservations/<id>/confirm/
+        Turns an unexpired hold into a Confirmed booking with one conditional
+        UPDATE, after re-checking the slot under the room lock in case
+        something else was booked over it meanwhile.
+        """
+        now = timezone.now()
+        holds = Reservation.objects.filter(pk=pk, status="Pending", hold_expires_at__gt=now)
+        if not request.user.is_staff:
+            holds = holds.filter(user=request.user)
+        expired = Response(
+            {"detail": "This hold has expired or does not exist."},
+            status=status.HTTP_409_CONFLICT,
+        )
+        with transaction.atomic():
+            hold = holds.only("room_id", "date", "start_time", "end_time").first()
+            if hold is None:
+                return expired
+            lock_slot(hold.room_id, hold.date, hold.start_time, hold.end_time, exclude=hold.pk)
+            if not holds.update(status="Confirmed", hold_expires_at=None, updated_at=now,
+                                version=F("version") + 1):
+                return expired
+            reservation = Reservation.objects.select_related("room", "user").get(pk=pk)
+            record_event(reservation, "confirmed")
+
+        # Email: confirmation
+        subject = "Your Reservation Confirmation"
+        context = {
+            "user": reservation.user,
+            "room": reservation.room,
+            "date": reservation.date,
+            "start_time": reservation.start_time,
+            "end_time": reservation.end_time,
+        }
+        send_booking_email(
+            reservation.user.email,
+            subject,
+            "reservation_confirmation",
+            context,
+        )
+        return Response(self.get_serializer(reservation).data)
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def events(self, request):
+        """
+        GET /api/reservations/events/?after=<event id>&limit=<n>  (staff)
+        Reads the reservation event log in id order. Pass the returned
+        cursor as `after` to continue.
+        """
+        try:
+            after = int(request.query_params.get("after", 0))
+            limit = min(int(request.query_params.get("limit", 500)), 1000)
+        except ValueError:
+            return Response({"detail": "after and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        events = events_after(after, limit)
+        return Response({
+            "cursor": events[-1].id if events else after,
+            "has_more": len(events) == limit,
+            "events": [
+                {
+                    "id": event.id,
+                    "booking_id": event.booking_id,
+                    "kind": event.kind,
+                    "payload": event.payload,
+                    "created_at": event.created_at,
+                }
+                for event in events
+            ],
+        })
+
+    @action(detail=False, methods=["get", "post"], url_path="calendar-token")
+    def calendar_token(self, request):
+        """
+        GET  /api/reservations/calendar-token/  -> the caller's feed URLs (created on first use)
+        POST /api/reservations/calendar-token/  -> new token; old feed URLs stop working
+        """
+        feed, created = CalendarFeed.objects.get_or_create(user=request.user)
+        if request.method == "POST" and not created:
+            feed.token = CalendarFeed._meta.get_field("token").get_default()
+            feed.save(update_fields=["token"])
+        data = {"url": request.build_absolute_uri(f"/api/reservations/calendar/{feed.token}.ics")}
+        if request.user.is_staff:
+            # Staff tokens also open per-room feeds
+            data["room_url_template"] = request.build_absolute_uri(
+                f"/api/reservations/calendar/{feed.token}/rooms/"
+            ) + "{room_id}.ics"
+        return Response(data)
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        """
+        GET /api/reservations/changes/?since=<cursor>
+        Reservations created/updated and ids deleted after `since`.
+        Without `since` this is a full snapshot. Keep calling with the
+        returned cursor while has_more is true; upsert by booking_id.
+        """
+        tombstones = ReservationTombstone.objects.all()
+        if request.user.is_staff:
+            # Staff see every booking; only tombstones of deleted ones apply
+            # (the others were left for the previous owner of a reassigned booking)
+            tombstones = tombstones.exclude(booking_id__in=Reservation.objects.values("booking_id"))
+        else:
+            tombstones = tombstones.filter(user_id=request.user.id)
+
+        try:
+            updated, deleted, cursor, has_more = changes_since(
+                self.get_queryset(),
+                tombstones,
+                request.query_params.get("since"),
+                limit=settings.SYNC_PAGE_SIZE,
+            )
+        except InvalidCursor as exc:
+            return Response({"since": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "cursor": cursor,
+            "has_more": has_more,
+            "updated": self.get_serializer(updated, many=True).data,
+            "deleted": deleted,
+        })
+
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all().order_by("username")
     serializer_class = UserSerializer
     permission_classes = [IsAdminUser]
 
-class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all().order_by("username")
+class UserViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
+    """
+    GET /api/users/?is_staff=true&username=<prefix>&joined_after=<date>&joined_before=<date>
+                   &ordering=-date_joined&page_size=<n>
+    Cursor-paginated; follow `next` for further pages.
+    """
+    queryset = User.objects.select_related("profile").order_by("username")
     serializer_class = AdminUserSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = UserCursorPagination
+    filter_backends = [OrderingFilter]
+    ordering_fields = ["username", "date_joined", "id"]
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action != "list":
+            return qs
+        params = self.request.query_params
+
+        is_staff = params.get("is_staff")
+        if is_staff is not None:
+            if is_staff.lower() not in ("true", "false", "1", "0"):
+                raise ValidationError({"is_staff": "Expected true or false."})
+            qs = qs.filter(is_staff=is_staff.lower() in ("true", "1"))
+
+        username = params.get("username", "").strip()
+        if username:
+            qs = qs.filter(username__istartswith=username)
+
+        for param, lookup in (("joined_after", "date_joined__gte"), ("joined_before", "date_joined__lt")):
+            value = params.get(param)
+            if value:
+                day = parse_date(value)
+                if day is None:
+                    raise ValidationError({param: "Expected a date (YYYY-MM-DD)."})
+                qs = qs.filter(**{lookup: start_of_day(day)})
+        return qs
 
     def perform_destroy(self, instance):
         # Protect superusers and prevent deleting yourself
@@ -216,4 +711,77 @@ class UserViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("Cannot delete a superuser.")
         if self.request.user == instance:
             raise PermissionDenied("You cannot delete your own account.")
-        super().perform_destroy(instance)
+        delete_with_reservations(instance, "the account they belonged to was removed")
+
+    @action(detail=False, methods=["post"], url_path="bulk", parser_classes=[MultiPartParser])
+    def bulk(self, request):
+        """
+        POST /api/users/bulk/  (multipart, field "file")
+        Same CSV format as `manage.py import_users`.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"file": ["This field is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = import_users(
+            codecs.iterdecode(upload, "utf-8-sig"),
+            chunk_size=settings.USER_IMPORT_CHUNK_SIZE,
+            workers=settings.USER_IMPORT_HASH_WORKERS,
+        )
+        return Response(result, status=status.HTTP_201_CREATED if result["created"] else status.HTTP_200_OK)
+
+
+# iCalendar feeds --------------------------------------------------------
+# Authenticated by the secret token in the URL (calendar clients can't send
+# JWTs). The ETag is built from the newest change, deletion and oldest
+# in-window booking for the user/room, plus the latest room edit, so an
+# unchanged poll is a 304 after a few index steps, without rendering.
+
+def _user_feed_etag(request, token):
+    request.calendar_feed = feed = feed_with_etag_parts(token)
+    if feed is None:
+        return None
+    return feed_etag(
+        feed.user_id, feed.last_updated_at, feed.last_deleted_at, feed.first_starts_at, feed.rooms_updated_at,
+    )
+
+
+def _room_feed_etag(request, token, room_id):
+    request.calendar_feed = feed = feed_with_etag_parts(token)
+    if feed is None or not feed.user.is_staff:
+        return None
+    request.calendar_room = room = room_with_etag_parts(room_id)
+    if room is None:
+        return None
+    return feed_etag(
+        f"room-{room_id}", room.last_updated_at, room.first_starts_at,
+        room.last_event_id, room.last_moved_event_id, room.updated_at,
+    )
+
+
+def _calendar_response(request, name, rows):
+    response = StreamingHttpResponse(
+        render_calendar(name, rows, request.get_host().split(":")[0]),
+        content_type="text/calendar; charset=utf-8",
+    )
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@condition(etag_func=_user_feed_etag)
+def user_calendar(request, token):
+    """GET /api/reservations/calendar/<token>.ics"""
+    feed = request.calendar_feed
+    if feed is None:
+        raise Http404
+    return _calendar_response(request, f"Bookings - {feed.user.username}", feed_reservations(user_id=feed.user_id))
+
+
+@condition(etag_func=_room_feed_etag)
+def room_calendar(request, token, room_id):
+    """GET /api/reservations/calendar/<token>/rooms/<room_id>.ics  (staff tokens only)"""
+    feed = request.calendar_feed
+    if feed is None or not feed.user.is_staff or request.calendar_room is None:
+        raise Http404
+    room = request.calendar_room
+    return _calendar_response(request, f"Bookings - {room.room_name}", feed_reservations(room_id=room_id))
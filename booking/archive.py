@@ -0,0 +1,103 @@
+# booking/archive.py
+
+from django.db import models, transaction
+from django.db.models import F, Max, Value
+
+from .models import Reservation, ReservationArchive
+
+# Columns copied from Reservation into ReservationArchive (everything but archived_at).
+ARCHIVE_FIELDS = [
+    field.attname for field in ReservationArchive._meta.concrete_fields
+    if field.name != "archived_at"
+]
+
+# Columns of reservations_between() rows, selected the same way from both
+# tables; listing_row() renames them to ReservationRowSerializer's keys.
+LISTING_FIELDS = ["booking_id", "room_id", "user_id", "date", "start_time", "end_time", "status"]
+
+
+def archive_batch(cutoff, batch_size=1000):
+    """
+    Moves up to `batch_size` reservations dated before `cutoff` into the
+    archive in one short transaction. Returns the number of rows moved.
+    The rows are deleted without post_delete, so archiving leaves no
+    tombstones or "deleted" events: the bookings still exist, in the archive.
+    """
+    with transaction.atomic():
+        rows = list(
+            Reservation.objects
+            .filter(date__lt=cutoff)
+            .order_by("booking_id")
+            .select_for_update(skip_locked=True)
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ReservationArchive.objects.bulk_create(
+            [ReservationArchive(**row) for row in rows],
+            ignore_conflicts=True,
+        )
+        Reservation.objects.delete_rows([row["booking_id"] for row in rows])
+    return len(rows)
+
+
+def archive_horizon():
+    """Latest archived date, or None if nothing has been archived."""
+    return ReservationArchive.objects.aggregate(latest=Max("date"))["latest"]
+
+
+def _listing(queryset, hold_expires_at, version):
+    return queryset.values(
+        *LISTING_FIELDS,
+        room_name=F("room__room_name"),
+        username=F("user__username"),
+        held_until=hold_expires_at,
+        row_version=version,
+    )
+
+
+def listing_row(row):
+    """A reservations_between() row with ReservationRowSerializer's keys."""
+    return {
+        "booking_id": row["booking_id"],
+        "room": row["room_id"],
+        "room_name": row["room_name"],
+        "user": row["user_id"],
+        "username": row["username"],
+        "date": row["date"],
+        "start_time": row["start_time"],
+        "end_time": row["end_time"],
+        "status": row["status"],
+        "hold_expires_at": row["held_until"],
+        "version": row["row_version"],
+    }
+
+
+def archived_between(date_from, date_to, **filters):
+    """Archived rows dated within [date_from, date_to]; hold_expires_at and version are None."""
+    return _listing(
+        ReservationArchive.objects.filter(date__range=(date_from, date_to), **filters),
+        Value(None, output_field=models.DateTimeField()),
+        Value(None, output_field=models.PositiveIntegerField()),
+    )
+
+
+def reservations_between(date_from, date_to, **filters):
+    """
+    Reservation rows (dicts, see listing_row()) dated within
+    [date_from, date_to], ordered by date and start time. The archive table
+    is only queried when date_from reaches back into archived dates.
+    Extra keyword arguments are applied as filters to both tables.
+    """
+    live = _listing(
+        Reservation.objects.filter(date__range=(date_from, date_to), **filters),
+        F("hold_expires_at"),
+        F("version"),
+    )
+
+    horizon = archive_horizon()
+    if horizon is None or date_from > horizon:
+        rows = live.order_by("date", "start_time")
+    else:
+        rows = live.union(archived_between(date_from, date_to, **filters), all=True).order_by("date", "start_time")
+    return [listing_row(row) for row in rows]
@@ -0,0 +1,94 @@
+# booking/audit.py
+
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
+from django.db import connections
+
+from .models import Reservation, start_of_day
+
+# Columns of one conflict, in CSV order
+OVERLAP_FIELDS = ["room_id", "date", "booking_id", "start_time", "end_time",
+                  "other_booking_id", "other_start_time", "other_end_time"]
+
+
+def confirmed_rows(room_id=None, date_from=None, date_to=None):
+    """
+    Confirmed bookings as (booking_id, room_id, starts_at, ends_at, date,
+    start_time, end_time) tuples ordered by (room, starts_at) - the
+    res_room_starts_idx order - streamed from a server-side cursor.
+    """
+    qs = Reservation.objects.filter(status="Confirmed")
+    if room_id is not None:
+        qs = qs.filter(room_id=room_id)
+    if date_from:
+        qs = qs.filter(starts_at__gte=start_of_day(date_from))
+    if date_to:
+        qs = qs.filter(starts_at__lt=start_of_day(date_to + timedelta(days=1)))
+    return (
+        qs.order_by("room_id", "starts_at", "booking_id")
+        .values_list("booking_id", "room_id", "starts_at", "ends_at", "date", "start_time", "end_time")
+        .iterator(chunk_size=2000)
+    )
+
+
+def sweep(rows):
+    """
+    Yields one dict per overlapping pair from rows sorted by (room, starts_at).
+    Keeps a heap of the bookings still running at the current start time, so
+    memory is bounded by the deepest overlap, not by the table size.
+    """
+    active = []  # (ends_at, booking_id, row) for the current room
+    current_room = None
+    for row in rows:
+        booking_id, room_id, starts_at, ends_at = row[:4]
+        if room_id != current_room:
+            active, current_room = [], room_id
+        while active and active[0][0] <= starts_at:
+            heapq.heappop(active)
+        for _, _, other in sorted(active, key=lambda item: item[1]):
+            yield {
+                "room_id": room_id,
+                "date": row[4],
+                "booking_id": other[0],
+                "start_time": other[5],
+                "end_time": other[6],
+                "other_booking_id": booking_id,
+                "other_start_time": row[5],
+                "other_end_time": row[6],
+            }
+        heapq.heappush(active, (ends_at, booking_id, row))
+
+
+def room_overlaps(room_id, date_from=None, date_to=None):
+    return list(sweep(confirmed_rows(room_id, date_from, date_to)))
+
+
+def find_overlaps(room_id=None, date_from=None, date_to=None, workers=1):
+    """
+    Overlapping confirmed bookings, ordered by room. With `workers` > 1 each
+    room is swept in its own process; otherwise one streaming pass is made.
+    """
+    if workers <= 1 or room_id is not None:
+        yield from sweep(confirmed_rows(room_id, date_from, date_to))
+        return
+
+    room_ids = list(
+        Reservation.objects.filter(status="Confirmed")
+        .order_by("room_id").values_list("room_id", flat=True).distinct()
+    )
+    # Forked workers must not share the parent's DB connection
+    connections.close_all()
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as executor:
+        for conflicts in executor.map(
+            room_overlaps, room_ids,
+            [date_from] * len(room_ids), [date_to] * len(room_ids),
+        ):
+            yield from conflicts
+
+
+def _init_worker():
+    django.setup()
+    connections.close_all()
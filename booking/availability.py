@@ -0,0 +1,104 @@
+# booking/availability.py
+
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Reservation, Room
+
+# Published under STATIC_ROOT, served by the /static/ route in vercel.json.
+# STATIC_ROOT is deployed from git, so .github/workflows/publish_availability.yml
+# runs `manage.py publish_availability` on a schedule and commits the output.
+PUBLISH_DIR = "availability"
+MANIFEST_NAME = "manifest.json"
+
+
+def busy_slots(date_from, date_to):
+    """
+    {date: {room_id: [[start, end], ...]}} for confirmed bookings in
+    [date_from, date_to]. Every room gets an entry for every day, so an
+    empty list means free all day.
+    """
+    room_ids = list(Room.objects.order_by("room_id").values_list("room_id", flat=True))
+    days = {}
+    day = date_from
+    while day <= date_to:
+        days[day] = {room_id: [] for room_id in room_ids}
+        day += timedelta(days=1)
+
+    rows = (
+        Reservation.objects
+        .filter(status="Confirmed", date__range=(date_from, date_to))
+        .order_by("date", "room_id", "start_time")
+        .values_list("date", "room_id", "start_time", "end_time")
+    )
+    for day, room_id, start, end in rows.iterator(chunk_size=2000):
+        days[day][room_id].append([start.strftime("%H:%M"), end.strftime("%H:%M")])
+    return days
+
+
+def _write(path, content):
+    # Write-then-rename so the static route never serves a half-written file
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+def publish(date_from, date_to, root=None, now=None):
+    """
+    Writes one content-hashed JSON file per day plus manifest.json (the
+    day -> file map clients read first). Days whose content hash matches
+    the current manifest are left alone. Files for days that changed or
+    fell out of the window are listed under "retired" in the manifest and
+    only removed AVAILABILITY_RETAIN_SECONDS later, so clients holding a
+    cached manifest can still fetch what it points to.
+    Returns (written, unchanged, removed) day counts.
+    """
+    now = now or timezone.now()
+    root = Path(root or settings.STATIC_ROOT) / PUBLISH_DIR
+    root.mkdir(parents=True, exist_ok=True)
+    manifest_path = root / MANIFEST_NAME
+    try:
+        old_manifest = json.loads(manifest_path.read_bytes())
+        previous, retired = old_manifest["days"], dict(old_manifest.get("retired", {}))
+    except (FileNotFoundError, KeyError, ValueError):
+        old_manifest, previous, retired = None, {}, {}
+
+    files, written, unchanged = {}, 0, 0
+    for day, rooms in busy_slots(date_from, date_to).items():
+        content = json.dumps(
+            {"date": day.isoformat(), "rooms": rooms},
+            separators=(",", ":"), sort_keys=True,
+        ).encode()
+        name = f"{day.isoformat()}.{hashlib.sha256(content).hexdigest()[:12]}.json"
+        files[day.isoformat()] = name
+        if previous.get(day.isoformat()) == name and (root / name).exists():
+            unchanged += 1
+            continue
+        _write(root / name, content)
+        written += 1
+
+    # Old versions of changed days and days that left the window: retire
+    # them now, delete the ones retired long enough ago
+    current = set(files.values())
+    retired = {name: since for name, since in retired.items() if name not in current}
+    for name in set(previous.values()) - current:
+        retired.setdefault(name, now.isoformat())
+    expired = {
+        name for name, since in retired.items()
+        if now - datetime.fromisoformat(since) >= timedelta(seconds=settings.AVAILABILITY_RETAIN_SECONDS)
+    }
+    for name in expired:
+        (root / name).unlink(missing_ok=True)
+        del retired[name]
+
+    manifest = {"from": date_from.isoformat(), "to": date_to.isoformat(), "days": files, "retired": retired}
+    if manifest != old_manifest:
+        _write(manifest_path, json.dumps(manifest, separators=(",", ":"), sort_keys=True).encode())
+    removed = len(set(previous) - set(files))
+    return written, unchanged, removed
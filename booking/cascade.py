@@ -0,0 +1,170 @@
+# booking/cascade.py
+
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import get_connection
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .events import snapshot_values
+from .models import Reservation, ReservationEvent, ReservationTombstone, Room
+from .utils import send_booking_email
+
+# (booking_id, room_id, user_id, date, start_time, end_time, status)
+CASCADE_FIELDS = ["booking_id", "room_id", "user_id", "date", "start_time", "end_time", "status"]
+
+# Bookings listed in one digest email; the rest are summarised as a count
+DIGEST_MAX_ITEMS = 50
+
+logger = logging.getLogger(__name__)
+
+
+def _insert_sql(connection, model, columns):
+    quote = connection.ops.quote_name
+    return (
+        f"INSERT INTO {quote(model._meta.db_table)} ({', '.join(quote(c) for c in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+
+
+def cascade_reservations(reservations, mode="delete", batch_size=None):
+    """
+    Deletes (mode="delete") or cancels (mode="cancel") every reservation in
+    the `reservations` queryset, `batch_size` rows per transaction. Each batch
+    is one SELECT of plain rows, executemany() inserts for the tombstones and
+    events, and one DELETE or UPDATE ... WHERE booking_id IN (...). No model
+    instances are built and no per-row signals or saves run.
+
+    Returns (count, upcoming) where `upcoming` maps user_id to the rows that
+    were still ahead of that user, for digest_emails().
+    """
+    batch_size = batch_size or settings.CASCADE_BATCH_SIZE
+    db = router.db_for_write(Reservation)
+    connection = connections[db]
+    today = timezone.localdate()
+    if mode == "cancel":
+        reservations = reservations.exclude(status="Cancelled")
+
+    payload_field = ReservationEvent._meta.get_field("payload")
+    event_sql = _insert_sql(connection, ReservationEvent,
+                            ["booking_id", "user_id", "room_id", "kind", "payload", "created_at"])
+    tombstone_sql = _insert_sql(connection, ReservationTombstone, ["booking_id", "user_id", "deleted_at"])
+
+    count, upcoming, last_id = 0, defaultdict(list), 0
+    while True:
+        with transaction.atomic(using=db):
+            rows = list(
+                reservations.using(db)
+                .filter(booking_id__gt=last_id)
+                .order_by("booking_id")
+                .values_list(*CASCADE_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            ids = [row[0] for row in rows]
+            now = timezone.now()
+            created_at = connection.ops.adapt_datetimefield_value(now)
+
+            events = []
+            for booking_id, room_id, user_id, *slot, status in rows:
+                payload = snapshot_values(room_id, user_id, *slot, status)
+                if mode == "cancel":
+                    payload["status"], payload["previous"] = "Cancelled", {"status": status}
+                events.append((
+                    booking_id, user_id, room_id, "cancelled" if mode == "cancel" else "deleted",
+                    payload_field.get_db_prep_save(payload, connection), created_at,
+                ))
+                if slot[0] >= today and status != "Cancelled":
+                    upcoming[user_id].append((room_id, *slot))
+
+            targets = Reservation.objects.using(db).filter(booking_id__in=ids)
+            with connection.cursor() as cursor:
+                if mode == "cancel":
+                    targets.update(status="Cancelled", hold_expires_at=None,
+                                   updated_at=now, version=F("version") + 1)
+                else:
+                    cursor.executemany(tombstone_sql, [(row[0], row[2], created_at) for row in rows])
+                    # Skips the Collector and the per-row post_delete signal,
+                    # whose tombstones/events are written here in bulk
+                    Reservation.objects.db_manager(db).delete_rows(ids)
+                cursor.executemany(event_sql, events)
+
+        count += len(rows)
+        last_id = ids[-1]
+    return count, upcoming
+
+
+def digest_emails(upcoming, reason):
+    """(email, context) per affected user; read up front so it survives deleting the user."""
+    users = User.objects.in_bulk(list(upcoming))
+    rooms = Room.objects.in_bulk({row[0] for rows in upcoming.values() for row in rows})
+    digests = []
+    for user_id, rows in upcoming.items():
+        user = users.get(user_id)
+        if user is None or not user.email:
+            continue
+        rows = sorted(rows, key=lambda row: row[1:3])
+        digests.append((user.email, {
+            "user": user,
+            "reason": reason,
+            "reservations": [
+                {"room": rooms.get(room_id), "date": day, "start_time": start, "end_time": end}
+                for room_id, day, start, end in rows[:DIGEST_MAX_ITEMS]
+            ],
+            "more": max(len(rows) - DIGEST_MAX_ITEMS, 0),
+        }))
+    return digests
+
+
+def send_digests(digests):
+    """
+    Sends the digests over one mail connection. A failed send is logged and
+    the rest still go out; the bookings are already gone by now.
+    Returns the number sent.
+    """
+    sent = 0
+    try:
+        with get_connection() as connection:
+            for email, context in digests:
+                try:
+                    send_booking_email(email, "Your Reservations Were Cancelled",
+                                       "reservation_cancellation_digest", context, connection=connection)
+                except Exception:
+                    logger.exception("Could not send the cancellation digest to %s", email)
+                else:
+                    sent += 1
+    except Exception:
+        logger.exception("Could not open a mail connection for %s cancellation digests", len(digests) - sent)
+    return sent
+
+
+def cancel_reservations(reservations, reason, batch_size=None):
+    """
+    Cancels every reservation in the `reservations` queryset through
+    cascade_reservations() and sends each affected user with upcoming
+    bookings one digest email. Returns {"reservations", "notified"}, where
+    "notified" counts the digests actually sent.
+    """
+    count, upcoming = cascade_reservations(reservations, "cancel", batch_size)
+    sent = send_digests(digest_emails(upcoming, reason))
+    return {"reservations": count, "notified": sent}
+
+
+def delete_with_reservations(obj, reason, batch_size=None):
+    """
+    Deletes a Room or User, first clearing its reservations through
+    cascade_reservations() so the ORM cascade has nothing left to collect.
+    Each affected user with upcoming bookings gets one digest email once
+    the final delete commits. Returns {"reservations", "queued"}: the
+    digests are not sent yet when this returns inside a transaction.
+    """
+    count, upcoming = cascade_reservations(obj.bookings.all(), "delete", batch_size)
+    digests = digest_emails(upcoming, reason)
+    with transaction.atomic():
+        obj.delete()
+        transaction.on_commit(lambda: send_digests(digests))
+    return {"reservations": count, "queued": len(digests)}
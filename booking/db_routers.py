@@ -0,0 +1,95 @@
+# booking/db_routers.py
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+REPLICA = "replica"
+PIN_COOKIE = "pin_primary"
+
+# True while a listing/catalog view is running and may read from the replica.
+_replica_reads = ContextVar("replica_reads", default=False)
+# True once the current request (or a recent one, via PIN_COOKIE) has written.
+_pinned = ContextVar("pinned_to_primary", default=False)
+_wrote = ContextVar("wrote_to_primary", default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+@contextmanager
+def replica_reads():
+    """Lets reads inside the block go to the replica (unless pinned)."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def use_replica(view_func):
+    """Decorator for read-only HTML views that can tolerate replica lag."""
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return view_func(*args, **kwargs)
+    return wrapper
+
+
+def start_request(pinned):
+    return _pinned.set(pinned), _wrote.set(False), _replica_reads.set(False)
+
+
+def end_request(tokens):
+    wrote = _wrote.get()
+    for var, token in zip((_pinned, _wrote, _replica_reads), tokens):
+        var.reset(token)
+    return wrote
+
+
+class ReplicaReadsMixin:
+    """
+    DRF viewset mixin: actions listed in `replica_actions` read from the
+    replica. Authentication runs before the switch, so it stays on the primary.
+    """
+    replica_actions = ("list", "retrieve")
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            self._replica_token = _replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            _replica_reads.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the `replica` alias only inside replica_reads() and only
+    while the request has not written anything; every write goes to `default`
+    and pins the rest of the request (and, through ReplicaPinningMiddleware,
+    the next few seconds of the session) to the primary.
+    Without a replica in settings.DATABASES everything stays on `default`.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and not (_pinned.get() or _wrote.get()) and replica_configured():
+            return REPLICA
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -0,0 +1,202 @@
+# booking/events.py
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EventConsumerOffset, ReservationEvent, ReservationTombstone, Room, RoomDailyUsage
+
+# Event ids are handed out at INSERT, not at commit, so a lower id can
+# become visible after a higher one. Readers stop at a gap in the ids until
+# the event after it is this old; by then the missing id is taken to be a
+# rolled-back insert and skipped. (Transactions that stay open longer than
+# this can still have their events skipped.)
+EVENT_GAP_TIMEOUT = timedelta(seconds=30)
+
+
+def snapshot(reservation):
+    """Compact, JSON-friendly state of a reservation as stored in event payloads."""
+    return snapshot_values(
+        reservation.room_id, reservation.user_id, reservation.date,
+        reservation.start_time, reservation.end_time, reservation.status,
+    )
+
+
+def snapshot_values(room_id, user_id, date, start_time, end_time, status):
+    """snapshot() from plain column values (for .values_list() rows)."""
+    return {
+        "room": room_id,
+        "user": user_id,
+        "date": date.isoformat(),
+        "start": start_time.isoformat(),
+        "end": end_time.isoformat(),
+        "status": status,
+    }
+
+
+def build_event(reservation, kind, previous=None):
+    """
+    Unsaved event for `reservation`. `previous` is the snapshot() taken
+    before the change; only fields that actually changed are kept under
+    payload["previous"].
+    """
+    payload = snapshot(reservation)
+    changed = {}
+    if previous:
+        changed = {key: value for key, value in previous.items() if payload.get(key) != value}
+        if changed:
+            payload["previous"] = changed
+    return ReservationEvent(
+        booking_id=reservation.booking_id,
+        user_id=reservation.user_id,
+        room_id=reservation.room_id,
+        kind=kind,
+        payload=payload,
+        previous_user_id=changed.get("user"),
+        previous_room_id=changed.get("room"),
+    )
+
+
+def record_event(reservation, kind, previous=None):
+    """Appends an event for `reservation`. Call it inside the transaction that changed the row."""
+    event = build_event(reservation, kind, previous)
+    event.save()
+    return event
+
+
+def record_update(reservation, previous):
+    """
+    record_event() for an edit, logged as "cancelled" when that is what the
+    edit did. A booking reassigned to someone else also leaves a tombstone
+    for the previous owner, so it drops out of their synced list.
+    """
+    if previous["user"] != reservation.user_id:
+        ReservationTombstone.objects.create(booking_id=reservation.booking_id, user_id=previous["user"])
+    cancelled = previous["status"] != "Cancelled" and reservation.status == "Cancelled"
+    return record_event(reservation, "cancelled" if cancelled else "updated", previous)
+
+
+def events_after(event_id, limit=500, now=None):
+    """
+    Up to `limit` events after `event_id` in id order, cut short at the
+    first recent gap in the ids (see EVENT_GAP_TIMEOUT), so that a cursor
+    taken from the last event never moves past an uncommitted one.
+    """
+    events = list(ReservationEvent.objects.filter(id__gt=event_id).order_by("id")[:limit])
+    horizon = (now or timezone.now()) - EVENT_GAP_TIMEOUT
+    expected = event_id + 1
+    for index, event in enumerate(events):
+        if event.id != expected and event.created_at > horizon:
+            return events[:index]
+        expected = event.id + 1
+    return events
+
+
+# Consumers ---------------------------------------------------------------
+
+CONSUMERS = {}
+
+
+def register(consumer_class):
+    CONSUMERS[consumer_class.name] = consumer_class()
+    return consumer_class
+
+
+class EventConsumer:
+    """
+    Keeps some derived state in step with the event log. `apply` receives
+    events in id order; `reset` wipes the derived state before a replay.
+    """
+    name = None
+
+    def reset(self):
+        raise NotImplementedError
+
+    def apply(self, events):
+        raise NotImplementedError
+
+
+def consume(consumer, batch_size=500, replay=False):
+    """
+    Feeds `consumer` every event after its stored offset (or from the start
+    of the log when `replay` is true), one batch per transaction.
+    Returns the number of events applied.
+    """
+    offset, _ = EventConsumerOffset.objects.get_or_create(name=consumer.name)
+    if replay:
+        with transaction.atomic():
+            consumer.reset()
+            offset.last_event_id = 0
+            offset.save(update_fields=["last_event_id"])
+
+    applied = 0
+    while True:
+        events = events_after(offset.last_event_id, batch_size)
+        if not events:
+            return applied
+        with transaction.atomic():
+            consumer.apply(events)
+            offset.last_event_id = events[-1].id
+            offset.save(update_fields=["last_event_id"])
+        applied += len(events)
+
+
+def states(event):
+    """
+    (before, after) snapshots of the booking around `event`; None where it
+    didn't exist. Holds being confirmed were Pending before the event.
+    """
+    payload = {key: value for key, value in event.payload.items() if key != "previous"}
+    if event.kind == "deleted":
+        return payload, None
+    if event.kind in ("updated", "cancelled"):
+        return {**payload, **event.payload.get("previous", {})}, payload
+    if event.kind == "confirmed":
+        return {**payload, "status": "Pending"}, payload
+    return None, payload
+
+
+@register
+class RoomDailyUsageConsumer(EventConsumer):
+    """
+    Confirmed bookings and booked minutes per room per day, built from the
+    event payloads alone, so a replay rebuilds it from the log and archived
+    bookings keep counting.
+    """
+    name = "room_daily_usage"
+
+    def reset(self):
+        RoomDailyUsage.objects.all().delete()
+
+    @staticmethod
+    def usage(state):
+        # ((room, date), minutes) that a snapshot counts towards, or None
+        if state is None or state["status"] != "Confirmed":
+            return None
+        start, end = time.fromisoformat(state["start"]), time.fromisoformat(state["end"])
+        minutes = (datetime.combine(date.min, end) - datetime.combine(date.min, start)).seconds // 60
+        return (state["room"], state["date"]), minutes
+
+    def apply(self, events):
+        deltas = defaultdict(lambda: [0, 0])
+        for event in events:
+            for state, sign in zip(states(event), (-1, 1)):
+                counted = self.usage(state)
+                if counted:
+                    key, minutes = counted
+                    deltas[key][0] += sign
+                    deltas[key][1] += sign * minutes
+
+        rooms = set(Room.objects.filter(pk__in={room_id for room_id, _ in deltas}).values_list("pk", flat=True))
+        for (room_id, day), (bookings, minutes) in deltas.items():
+            if room_id not in rooms or (not bookings and not minutes):
+                continue  # deleted rooms take their usage rows with them
+            usage, _ = RoomDailyUsage.objects.select_for_update().get_or_create(room_id=room_id, date=day)
+            usage.bookings += bookings
+            usage.booked_minutes += minutes
+            if usage.bookings > 0:
+                usage.save(update_fields=["bookings", "booked_minutes"])
+            else:
+                usage.delete()
@@ -3,13 +3,33 @@ from .models import Reservation, Room, Profile
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
+from .widgets import AutocompleteInput
 
 
-class ReservationForm(forms.ModelForm):
+class VersionedFormMixin:
+    """
+    Carries Reservation.version through a hidden field, so saving an edit
+    made from a stale page raises StaleReservationError.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["version"] = forms.IntegerField(
+            widget=forms.HiddenInput, required=False, initial=self.instance.version,
+        )
+
+    def save(self, commit=True):
+        if self.instance.pk and self.cleaned_data.get("version"):
+            self.instance.version = self.cleaned_data["version"]
+        return super().save(commit)
+
+
+class ReservationForm(VersionedFormMixin, forms.ModelForm):
     class Meta:
         model = Reservation
         fields = ["room", "date", "start_time", "end_time"]  # no "user"
         widgets = {
+            "room": AutocompleteInput("lookup_rooms"),
             "date": forms.DateInput(attrs={"type": "date"}),
             "start_time": forms.TimeInput(attrs={"type": "time"}),
             "end_time": forms.TimeInput(attrs={"type": "time"}),
@@ -39,12 +59,14 @@ class SignUpForm(UserCreationForm):
         return user
 
 
-class AdminReservationForm(forms.ModelForm):
+class AdminReservationForm(VersionedFormMixin, forms.ModelForm):
     class Meta:
         model = Reservation
         fields = ["user", "room", "date", "start_time", "end_time", "status"]
 
         widgets = {
+            "user": AutocompleteInput("lookup_users"),
+            "room": AutocompleteInput("lookup_rooms"),
             "date": forms.DateInput(attrs={"type": "date"}),
             "start_time": forms.TimeInput(attrs={"type": "time"}),
             "end_time": forms.TimeInput(attrs={"type": "time"}),
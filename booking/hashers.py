@@ -0,0 +1,35 @@
+# booking/hashers.py
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the iteration count taken from settings.PBKDF2_ITERATIONS.
+    Hashes stored with a different count are re-encoded on the next successful
+    login, because check_password() asks must_update() after verifying.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PBKDF2_ITERATIONS
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with time/memory/parallelism taken from settings.ARGON2_*.
+    Requires the argon2-cffi package.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
@@ -0,0 +1,140 @@
+# booking/ical.py
+
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import CalendarFeed, Reservation, ReservationEvent, ReservationTombstone, Room
+
+# Feeds include bookings from this far back onwards
+FEED_HISTORY = timedelta(days=90)
+
+ICAL_STATUS = {"Confirmed": "CONFIRMED", "Pending": "TENTATIVE", "Cancelled": "CANCELLED"}
+
+FEED_COLUMNS = ["booking_id", "starts_at", "ends_at", "updated_at", "status", "version",
+                "room__room_name", "room__location", "user__username"]
+
+
+def _first(queryset, order_by):
+    # First value of the ordering column: one index step when an index matches
+    return Subquery(queryset.order_by(order_by).values(order_by.lstrip("-"))[:1])
+
+
+def feed_with_etag_parts(token):
+    """
+    The CalendarFeed for `token` (or None), annotated in the same query
+    with what its content depends on, for the feed's ETag. These come from
+    the rows themselves, so ORM and admin writes count as well:
+    `last_updated_at` (newest edit or insert of the user's bookings),
+    `last_deleted_at` (newest tombstone: a booking deleted or reassigned),
+    `first_starts_at` (oldest booking in the feed window, which moves when
+    rows are archived or age out) and `rooms_updated_at` (newest room edit,
+    since room names are shown).
+    """
+    user = OuterRef("user_id")
+    return (
+        CalendarFeed.objects.select_related("user")
+        .annotate(
+            last_updated_at=_first(Reservation.objects.filter(user_id=user), "-updated_at"),
+            last_deleted_at=_first(ReservationTombstone.objects.filter(user_id=user), "-deleted_at"),
+            first_starts_at=_first(
+                Reservation.objects.filter(user_id=user, starts_at__gte=timezone.now() - FEED_HISTORY), "starts_at"
+            ),
+            rooms_updated_at=_first(Room.objects.all(), "-updated_at"),
+        )
+        .filter(token=token)
+        .first()
+    )
+
+
+def room_with_etag_parts(room_id):
+    """
+    The Room (or None) annotated like feed_with_etag_parts(), for a room
+    feed. Tombstones are per user, so bookings leaving the room are seen
+    through its newest event (`last_event_id`: deletes, including
+    cascades) and newest move away (`last_moved_event_id`).
+    """
+    room = OuterRef("pk")
+    return (
+        Room.objects.only("room_name", "updated_at")
+        .annotate(
+            last_updated_at=_first(Reservation.objects.filter(room_id=room), "-updated_at"),
+            first_starts_at=_first(
+                Reservation.objects.filter(room_id=room, starts_at__gte=timezone.now() - FEED_HISTORY), "starts_at"
+            ),
+            last_event_id=_first(ReservationEvent.objects.filter(room_id=room), "-id"),
+            last_moved_event_id=_first(ReservationEvent.objects.filter(previous_room_id=room), "-id"),
+        )
+        .filter(pk=room_id)
+        .first()
+    )
+
+
+def feed_etag(prefix, *parts):
+    """Strong ETag from the annotations above (datetimes, ids or None)."""
+    stamps = [
+        int(part.timestamp() * 1_000_000) if hasattr(part, "timestamp") else part or 0
+        for part in parts
+    ]
+    return '"' + "-".join(map(str, [prefix, *stamps])) + '"'
+
+
+def _escape(text):
+    return (text.replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def _fold(line):
+    # RFC 5545: lines longer than 75 octets continue on lines starting with a space
+    data = line.encode()
+    if len(data) <= 75:
+        return line + "\r\n"
+    chunks, start = [], 0
+    while start < len(data):
+        end = start + (75 if not chunks else 74)
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1  # don't split a UTF-8 sequence
+        chunks.append(data[start:end].decode())
+        start = end
+    return "\r\n ".join(chunks) + "\r\n"
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def feed_reservations(**filters):
+    """Rows for a feed: recent and upcoming reservations, streamed in start order."""
+    return (
+        Reservation.objects
+        .filter(starts_at__gte=timezone.now() - FEED_HISTORY, **filters)
+        .order_by("starts_at")
+        .values_list(*FEED_COLUMNS)
+        .iterator(chunk_size=500)
+    )
+
+
+def render_calendar(name, rows, domain):
+    """Yields the VCALENDAR text a few lines at a time, one VEVENT per row."""
+    yield "".join(_fold(line) for line in [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//BookingSystem//Reservations//EN",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_escape(name)}",
+    ])
+    for booking_id, starts_at, ends_at, updated_at, status, version, room_name, location, username in rows:
+        yield "".join(_fold(line) for line in [
+            "BEGIN:VEVENT",
+            f"UID:booking-{booking_id}@{domain}",
+            f"DTSTAMP:{_utc(updated_at)}",
+            f"DTSTART:{_utc(starts_at)}",
+            f"DTEND:{_utc(ends_at)}",
+            f"SEQUENCE:{version}",
+            f"SUMMARY:{_escape(f'{room_name} ({username})')}",
+            f"LOCATION:{_escape(location)}",
+            f"STATUS:{ICAL_STATUS.get(status, 'CONFIRMED')}",
+            "END:VEVENT",
+        ])
+    yield "END:VCALENDAR\r\n"
@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking.archive import archive_batch
+from booking.models import Reservation
+
+
+class Command(BaseCommand):
+    help = "Move reservations older than N days into the archive table, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            required=True,
+            metavar="DAYS",
+            help="Archive reservations dated more than DAYS days ago.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many reservations would be archived.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.localdate() - timedelta(days=options["older_than"])
+
+        if options["dry_run"]:
+            count = Reservation.objects.filter(date__lt=cutoff).count()
+            self.stdout.write(f"{count} reservations dated before {cutoff} would be archived.")
+            return
+
+        total = 0
+        while True:
+            moved = archive_batch(cutoff, options["batch_size"])
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f"Archived {total} reservations so far...")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} reservations dated before {cutoff}."))
@@ -0,0 +1,65 @@
+import time
+from datetime import time as clock, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from booking.allocation import allocate
+from booking.models import Room
+
+ROOM_TYPES = ["Conference", "Huddle", "Training"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time booking.allocation.allocate() on a synthetic batch: meetings spread over "
+        "five hours plus one hour that is oversubscribed. Test rooms are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=100)
+        parser.add_argument("--requests", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            Room.objects.bulk_create(benchmark_rooms(options["rooms"]))
+            requests = benchmark_requests(options["requests"], options["rooms"])
+            start = time.perf_counter()
+            plan = allocate(requests)
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{len(requests)} requests, {options['rooms']} rooms: {elapsed * 1000:.0f} ms, "
+            f"{len(plan['assignments'])} assigned, {len(plan['unassigned'])} unassigned, "
+            f"{plan['wasted_seats']} wasted seats"
+        )
+
+
+def benchmark_rooms(count):
+    return [
+        Room(room_name=f"Benchmark Room {i}", capacity=4 + i % 5 * 4, location="Benchmark",
+             room_type=ROOM_TYPES[i % 3], facilities="Projector, Whiteboard" if i % 2 else "Whiteboard")
+        for i in range(count)
+    ]
+
+
+def benchmark_requests(count, rooms):
+    """
+    Hour-long meetings from 09:00 to 14:00, plus as many meetings at 15:00
+    as there are rooms and half again, so that hour cannot all be placed.
+    """
+    day = timezone.localdate() + timedelta(days=7)
+    crowded = min(count, rooms + rooms // 2)
+    requests = [
+        {"id": f"spread-{i}", "date": day, "start_time": clock(9 + i % 5), "end_time": clock(10 + i % 5),
+         "attendees": 1 + i % 16, "room_type": ROOM_TYPES[i % 3] if i % 4 == 0 else "",
+         "facilities": ["projector"] if i % 3 == 0 else []}
+        for i in range(count - crowded)
+    ]
+    requests += [
+        {"id": f"crowded-{i}", "date": day, "start_time": clock(15), "end_time": clock(16), "attendees": 2}
+        for i in range(crowded)
+    ]
+    return requests
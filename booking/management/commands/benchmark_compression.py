@@ -0,0 +1,119 @@
+import gzip
+import time
+from datetime import time as clock, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.text import compress_sequence
+
+from booking.ical import feed_reservations, render_calendar
+from booking.middleware import brotli, coalesce
+from booking.models import Room, Reservation
+from booking.renderers import ORJSONRenderer
+from booking.serializers import ReservationRowSerializer, RoomRowSerializer
+
+GZIP_LEVELS = (1, 6, 9)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare CPU time against bytes saved for gzip levels (and brotli, if installed) "
+        "on representative API, HTML and calendar payloads. Test rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if brotli is None:
+            self.stdout.write(self.style.WARNING("brotli is not installed; only gzip is measured."))
+
+        with transaction.atomic():
+            user = self.seed(options["rows"])
+            reservations = Reservation.objects.select_related("room", "user").order_by("date", "start_time")
+            payloads = {
+                "GET /api/rooms/ (small)": ORJSONRenderer().render(RoomRowSerializer(Room.objects.all()[:3]).data),
+                "GET /api/reservations/ (100 rows)": ORJSONRenderer().render(
+                    ReservationRowSerializer(reservations[:100]).data
+                ),
+                f"GET /api/reservations/ ({options['rows']} rows)": ORJSONRenderer().render(
+                    ReservationRowSerializer(reservations.all()).data
+                ),
+                "manage_reservations (HTML)": render_to_string(
+                    "booking/manage_reservations.html", {"reservations": reservations.all()[:2000]}
+                ).encode(),
+            }
+            calendar = [
+                chunk.encode() for chunk in
+                render_calendar("Benchmark", feed_reservations(user=user), "benchmark.invalid")
+            ]
+            payloads["calendar feed (.ics)"] = b"".join(calendar)
+            transaction.set_rollback(True)
+
+        for label, content in payloads.items():
+            note = " (below COMPRESSION_MIN_SIZE, sent as is)" if len(content) < settings.COMPRESSION_MIN_SIZE else ""
+            self.stdout.write(f"{label}: {len(content) / 1024:.1f} KiB{note}")
+            for codec, compress in self.codecs():
+                elapsed, size = self.measure(lambda: compress(content), options["repeat"])
+                self.report(codec, len(content), size, elapsed)
+
+        # Streaming: per-event chunks flushed one by one vs regrouped like the middleware does
+        self.stdout.write(f"calendar feed streamed ({len(calendar)} chunks):")
+        for label, chunks in [
+            ("gzip per chunk", lambda: calendar),
+            (f"gzip coalesced to {settings.COMPRESSION_STREAM_CHUNK} B",
+             lambda: coalesce(calendar, settings.COMPRESSION_STREAM_CHUNK)),
+        ]:
+            elapsed, size = self.measure(lambda: b"".join(compress_sequence(chunks())), options["repeat"])
+            self.report(label, len(payloads["calendar feed (.ics)"]), size, elapsed)
+
+    def seed(self, rows):
+        rooms = Room.objects.bulk_create([
+            Room(room_name=f"Benchmark Room {i}", capacity=10, location=f"Building {i % 4}, Floor {i % 3}",
+                 facilities="Projector, Whiteboard, Video conferencing", room_type="Conference")
+            for i in range(20)
+        ])
+        users = User.objects.bulk_create([
+            User(username=f"benchmark-user-{i}", password="!") for i in range(200)
+        ])
+        today = timezone.localdate()
+        Reservation.objects.bulk_create([
+            Reservation(
+                room=rooms[i % len(rooms)],
+                user=users[i % 5],  # a few users with long calendar feeds
+                date=today + timedelta(days=i // 80),
+                start_time=clock(8 + i % 8),
+                end_time=clock(9 + i % 8),
+                status="Confirmed",
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+        return users[0]
+
+    def codecs(self):
+        for level in GZIP_LEVELS:
+            yield f"gzip -{level}", lambda content, level=level: gzip.compress(content, compresslevel=level, mtime=0)
+        if brotli is not None:
+            quality = settings.COMPRESSION_BROTLI_QUALITY
+            for q in sorted({quality, 11}):
+                yield f"br q{q}", lambda content, q=q: brotli.compress(content, quality=q)
+
+    def measure(self, compress, repeat):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = compress()
+            best = min(best, time.perf_counter() - start)
+        return best, len(output)
+
+    def report(self, label, original, compressed, elapsed):
+        saved = original - compressed
+        self.stdout.write(
+            f"  {label}: {compressed / 1024:.1f} KiB ({compressed / original:.0%}), "
+            f"{elapsed * 1000:.2f} ms, {saved / 1024 / max(elapsed * 1000, 0.001):.0f} KiB saved per ms"
+        )
@@ -0,0 +1,83 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from booking.hashers import TunedArgon2PasswordHasher, TunedPBKDF2PasswordHasher
+
+
+class Command(BaseCommand):
+    help = "Measure password checks (logins) per second per core for each hasher policy."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--policy",
+            action="append",
+            choices=sorted(settings.PASSWORD_HASHER_POLICIES),
+            help="Policy to benchmark (repeatable). Defaults to all policies.",
+        )
+        parser.add_argument(
+            "--pbkdf2-iterations",
+            type=int,
+            nargs="+",
+            help="PBKDF2 iteration counts to compare. Defaults to settings.PBKDF2_ITERATIONS.",
+        )
+        parser.add_argument(
+            "--argon2-memory-cost",
+            type=int,
+            nargs="+",
+            help="Argon2 memory costs (KiB) to compare. Defaults to settings.ARGON2_MEMORY_COST.",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=2.0,
+            help="Seconds to spend on each variant (default: 2).",
+        )
+
+    def handle(self, *args, **options):
+        policies = options["policy"] or sorted(settings.PASSWORD_HASHER_POLICIES)
+        variants = []
+
+        if "pbkdf2" in policies:
+            for iterations in options["pbkdf2_iterations"] or [settings.PBKDF2_ITERATIONS]:
+                variants.append((
+                    f"pbkdf2 iterations={iterations}",
+                    TunedPBKDF2PasswordHasher(),
+                    {"PBKDF2_ITERATIONS": iterations},
+                ))
+
+        if "argon2" in policies:
+            try:
+                TunedArgon2PasswordHasher()._load_library()
+            except ValueError:
+                self.stdout.write(self.style.WARNING("Skipping argon2: argon2-cffi is not installed."))
+            else:
+                for memory_cost in options["argon2_memory_cost"] or [settings.ARGON2_MEMORY_COST]:
+                    variants.append((
+                        f"argon2 time_cost={settings.ARGON2_TIME_COST} "
+                        f"memory_cost={memory_cost} parallelism={settings.ARGON2_PARALLELISM}",
+                        TunedArgon2PasswordHasher(),
+                        {"ARGON2_MEMORY_COST": memory_cost},
+                    ))
+
+        for label, hasher, overrides in variants:
+            with override_settings(**overrides):
+                logins, cpu_seconds = self.measure(hasher, options["duration"])
+            self.stdout.write(
+                f"{label}: {logins / cpu_seconds:.1f} logins/sec/core "
+                f"({cpu_seconds / logins * 1000:.1f} ms CPU per login)"
+            )
+
+    def measure(self, hasher, duration):
+        password = "benchmark-Password-123"
+        encoded = hasher.encode(password, hasher.salt())
+
+        logins = 0
+        cpu_start = time.process_time()
+        wall_end = time.perf_counter() + duration
+        while logins == 0 or time.perf_counter() < wall_end:
+            hasher.verify(password, encoded)
+            logins += 1
+        return logins, time.process_time() - cpu_start
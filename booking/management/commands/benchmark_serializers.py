@@ -0,0 +1,81 @@
+import time
+import tracemalloc
+from datetime import time as clock, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from booking.models import Room, Reservation
+from booking.renderers import ORJSONRenderer, orjson
+from booking.serializers import ReservationRowSerializer, ReservationSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/sec and peak memory of ReservationSerializer + JSONRenderer "
+        "against the .values() fast path + ORJSONRenderer. Test rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; ORJSONRenderer uses stdlib json."))
+
+        with transaction.atomic():
+            self.seed(options["rows"])
+            queryset = Reservation.objects.select_related("room", "user").order_by("date", "start_time")
+
+            variants = [
+                ("ReservationSerializer + JSONRenderer",
+                 lambda: JSONRenderer().render(ReservationSerializer(queryset.all(), many=True).data)),
+                ("ReservationRowSerializer + JSONRenderer",
+                 lambda: JSONRenderer().render(ReservationRowSerializer(queryset.all()).data)),
+                ("ReservationRowSerializer + ORJSONRenderer",
+                 lambda: ORJSONRenderer().render(ReservationRowSerializer(queryset.all()).data)),
+            ]
+            for label, render in variants:
+                elapsed, peak, size = self.measure(render)
+                self.stdout.write(
+                    f"{label}: {options['rows'] / elapsed:,.0f} rows/sec, "
+                    f"peak {peak / 1024 / 1024:.1f} MiB, {size / 1024:.0f} KiB output"
+                )
+
+            transaction.set_rollback(True)
+
+    def seed(self, rows):
+        rooms = Room.objects.bulk_create([
+            Room(room_name=f"Benchmark Room {i}", capacity=10, location="Benchmark", room_type="Huddle")
+            for i in range(20)
+        ])
+        users = User.objects.bulk_create([
+            User(username=f"benchmark-user-{i}", password="!") for i in range(200)
+        ])
+        today = timezone.localdate()
+        Reservation.objects.bulk_create([
+            Reservation(
+                room=rooms[i % len(rooms)],
+                user=users[i % len(users)],
+                date=today + timedelta(days=i // 80),
+                start_time=clock(8 + i % 8),
+                end_time=clock(9 + i % 8),
+                status="Confirmed",
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+
+    def measure(self, render):
+        # Timed and memory-traced separately: tracemalloc slows allocation down a lot.
+        start = time.perf_counter()
+        output = render()
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        render()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed, peak, len(output)
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+USERNAME = "session-benchmark"
+PASSWORD = "Session-Benchmark-1"
+
+
+class Command(BaseCommand):
+    help = (
+        "Count the DB queries per page for each session strategy "
+        "(manage_bookings, make_reservation, login_view). Test data is rolled back."
+    )
+
+    def handle(self, *args, **options):
+        results = {}
+        # Password hashing cost is irrelevant to query counts
+        with transaction.atomic(), override_settings(
+            PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+        ):
+            User.objects.create_user(username=USERNAME, password=PASSWORD)
+            for strategy, engine in settings.SESSION_ENGINES.items():
+                cache.clear()
+                with override_settings(SESSION_ENGINE=engine):
+                    results[strategy] = self.measure()
+            transaction.set_rollback(True)
+
+        baseline = results["db"]
+        for strategy, counts in results.items():
+            self.stdout.write(f"{strategy}{' (current)' if strategy == settings.SESSION_STRATEGY else ''}:")
+            for page, count in counts.items():
+                self.stdout.write(f"  {page}: {count} queries ({count - baseline[page]:+d} vs db)")
+
+    def measure(self):
+        client = Client()
+        return {
+            "login_view (GET)": self.count(lambda: client.get(reverse("login"))),
+            "login_view (POST)": self.count(
+                lambda: client.post(reverse("login"), {"username": USERNAME, "password": PASSWORD}),
+                warm=False,
+            ),
+            "manage_bookings": self.count(lambda: client.get(reverse("manage_bookings"))),
+            "make_reservation": self.count(lambda: client.get(reverse("make_reservation"))),
+        }
+
+    def count(self, request, warm=True):
+        if warm:
+            request()  # steady state: cached_db has the session in cache after the first hit
+        with CaptureQueriesContext(connection) as queries:
+            request()
+        return len(queries)
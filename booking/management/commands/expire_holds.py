@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking.models import Reservation
+
+
+class Command(BaseCommand):
+    help = "Delete expired tentative holds (Pending reservations past hold_expires_at) in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = Reservation.objects.filter(status="Pending", hold_expires_at__lte=now)
+        total = 0
+        while True:
+            ids = list(expired.values_list("booking_id", flat=True)[:options["batch_size"]])
+            if not ids:
+                break
+            # Re-check the status so a hold confirmed meanwhile is left alone
+            deleted, _ = expired.filter(booking_id__in=ids).delete()
+            total += deleted
+
+        self.stdout.write(self.style.SUCCESS(f"Removed {total} expired holds."))
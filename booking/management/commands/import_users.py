@@ -0,0 +1,55 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from booking.provisioning import import_users
+
+
+class Command(BaseCommand):
+    help = "Create users and profiles in bulk from a CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="CSV with a header row; only `username` is required.")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes used to hash passwords (default: 1, no pool).",
+        )
+        parser.add_argument(
+            "--invites-out",
+            help="Write invite tokens for users created without a password to this CSV file.",
+        )
+
+    def handle(self, *args, **options):
+        def progress(result):
+            self.stdout.write(
+                f"Processed {result['processed']} rows: "
+                f"{result['created']} created, {len(result['failed'])} failed"
+            )
+
+        with open(options["csv_path"], newline="", encoding="utf-8-sig") as f:
+            result = import_users(
+                f,
+                chunk_size=options["chunk_size"],
+                workers=options["workers"],
+                progress=progress,
+            )
+
+        for failure in result["failed"]:
+            messages = "; ".join(
+                f"{field}: {' '.join(errors)}" for field, errors in failure["errors"].items()
+            )
+            self.stderr.write(f"Line {failure['line']} ({failure['username'] or '-'}): {messages}")
+
+        if options["invites_out"] and result["invites"]:
+            with open(options["invites_out"], "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=["username", "uid", "token"])
+                writer.writeheader()
+                writer.writerows(result["invites"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']} users ({len(result['invites'])} invites), "
+            f"{len(result['failed'])} rows failed."
+        ))
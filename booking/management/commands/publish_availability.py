@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking.availability import publish
+
+
+class Command(BaseCommand):
+    help = (
+        "Write per-day room availability JSON (content-hashed, plus manifest.json) "
+        "into STATIC_ROOT/availability for the CDN. Only days that changed are rewritten. "
+        "Run on a schedule by .github/workflows/publish_availability.yml."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=14, help="Length of the rolling window (default 14).")
+        parser.add_argument("--output-dir", help="Publish under this directory instead of STATIC_ROOT.")
+
+    def handle(self, *args, **options):
+        date_from = timezone.localdate()
+        date_to = date_from + timedelta(days=options["days"] - 1)
+        written, unchanged, removed = publish(date_from, date_to, options["output_dir"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Availability {date_from} to {date_to}: {written} days written, "
+            f"{unchanged} unchanged, {removed} removed."
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from booking.events import CONSUMERS, consume
+
+
+class Command(BaseCommand):
+    help = "Rebuild derived state by replaying the reservation event log through its consumers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--consumer",
+            action="append",
+            help=f"Consumer to replay (repeatable). Defaults to all: {', '.join(sorted(CONSUMERS))}.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue from each consumer's stored offset instead of rebuilding from scratch.",
+        )
+
+    def handle(self, *args, **options):
+        names = options["consumer"] or sorted(CONSUMERS)
+        unknown = set(names) - set(CONSUMERS)
+        if unknown:
+            raise CommandError(f"Unknown consumer(s): {', '.join(sorted(unknown))}")
+
+        for name in names:
+            applied = consume(CONSUMERS[name], options["batch_size"], replay=not options["resume"])
+            self.stdout.write(self.style.SUCCESS(f"{name}: applied {applied} events."))
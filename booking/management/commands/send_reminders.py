@@ -4,12 +4,17 @@ from django.core.mail import send_mail
 from booking.models import Reservation
 from datetime import timedelta
 
+
+def reservations_to_remind(day):
+    return Reservation.objects.select_related("room", "user").filter(status="Confirmed").starting_on(day)
+
+
 class Command(BaseCommand):
     help = "Send reminder emails for tomorrow's reservations."
 
     def handle(self, *args, **kwargs):
         tomorrow = timezone.localdate() + timedelta(days=1)
-        reservations = Reservation.objects.filter(date=tomorrow, status="Confirmed")
+        reservations = reservations_to_remind(tomorrow)
 
         for reservation in reservations:
             send_mail(
@@ -0,0 +1,27 @@
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Delete expired database sessions in small batches (unlike clearsessions' single DELETE)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        total = 0
+        while True:
+            keys = list(
+                Session.objects
+                .filter(expire_date__lt=now)
+                .values_list("session_key", flat=True)[:options["batch_size"]]
+            )
+            if not keys:
+                break
+            Session.objects.filter(session_key__in=keys).delete()
+            total += len(keys)
+            self.stdout.write(f"Deleted {total} expired sessions so far...")
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} expired sessions."))
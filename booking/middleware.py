@@ -0,0 +1,148 @@
+# booking/middleware.py
+
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+from .db_routers import PIN_COOKIE, end_request, replica_configured, start_request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip only without it
+    brotli = None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Read-after-write for the replica router: once a request writes, the
+    client gets a short-lived cookie and its following requests read from
+    the primary until the replica has caught up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_configured():
+            return self.get_response(request)
+
+        tokens = start_request(PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = end_request(tokens)
+
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE, "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+def accepted_encodings(header):
+    """Codings from an Accept-Encoding header with a non-zero q-value."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        match = re.search(r"q=([0-9.]+)", params)
+        if coding and (match is None or float(match.group(1) or 0) > 0):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def coalesce(chunks, size):
+    """Regroups a byte stream into pieces of at least `size` bytes (the last may be shorter)."""
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield b"".join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def brotli_string(content):
+    return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+
+def brotli_sequence(chunks):
+    compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+    for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Content-negotiated response compression: brotli when the client accepts
+    it and the package is installed, gzip otherwise.
+
+    - Responses under COMPRESSION_MIN_SIZE bytes, already encoded ones and
+      COMPRESSION_EXCLUDED_TYPES (images, archives, ...) are left alone.
+    - Streaming responses are compressed on the fly, regrouped into
+      COMPRESSION_STREAM_CHUNK pieces so each flush still compresses well.
+    - HTML always uses gzip with Django's random-padding BREACH mitigation,
+      since it can carry CSRF tokens.
+    - Strong ETags become weak, as GZipMiddleware does, so If-None-Match
+      keeps matching.
+    """
+    max_random_bytes = 100
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header("Content-Encoding") or response.status_code in (204, 304):
+            return response
+        if getattr(response, "is_async", False):
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type.startswith(tuple(settings.COMPRESSION_EXCLUDED_TYPES)):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if brotli is not None and "br" in accepted and content_type != "text/html":
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+        else:
+            return response
+
+        if response.streaming:
+            chunks = coalesce(response.streaming_content, settings.COMPRESSION_STREAM_CHUNK)
+            if encoding == "br":
+                response.streaming_content = brotli_sequence(chunks)
+            else:
+                response.streaming_content = compress_sequence(chunks, max_random_bytes=self.max_random_bytes)
+            del response.headers["Content-Length"]
+        else:
+            if encoding == "br":
+                compressed = brotli_string(response.content)
+            else:
+                compressed = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['date', 'start_time'], name='res_date_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'date', 'start_time'], name='res_user_date_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['date', 'status'], name='res_date_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('status', 'Confirmed')), fields=['room', 'date', 'start_time'], name='res_room_date_confirmed_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0002_reservation_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationArchive',
+            fields=[
+                ('booking_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Confirmed', 'Confirmed'), ('Cancelled', 'Cancelled')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='booking.room')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'start_time'], name='res_archive_date_start_idx'), models.Index(fields=['user', 'date'], name='res_archive_user_date_idx')],
+            },
+        ),
+    ]
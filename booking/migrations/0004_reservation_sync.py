@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0003_reservation_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('booking_id', models.IntegerField()),
+                ('user_id', models.IntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'updated_at'], name='res_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservationtombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservationtombstone',
+            index=models.Index(fields=['user_id', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_timestamps(apps, schema_editor):
+    Reservation = apps.get_model("booking", "Reservation")
+    tz = timezone.get_current_timezone()
+    batch = []
+    for reservation in Reservation.objects.only("date", "start_time", "end_time").iterator(chunk_size=2000):
+        reservation.starts_at = timezone.make_aware(datetime.combine(reservation.date, reservation.start_time), tz)
+        reservation.ends_at = timezone.make_aware(datetime.combine(reservation.date, reservation.end_time), tz)
+        batch.append(reservation)
+        if len(batch) == 2000:
+            Reservation.objects.bulk_update(batch, ["starts_at", "ends_at"])
+            batch = []
+    Reservation.objects.bulk_update(batch, ["starts_at", "ends_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0004_reservation_sync'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='reservation',
+            name='res_date_status_idx',
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='starts_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='ends_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_timestamps, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reservation',
+            name='starts_at',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='ends_at',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['starts_at'], name='res_starts_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'starts_at'], name='res_user_starts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('status', 'Confirmed')), fields=['room', 'starts_at'], name='res_room_starts_confirmed_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0005_reservation_timestamps'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='reservation',
+            name='res_room_starts_confirmed_idx',
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['room', 'starts_at'], name='res_room_starts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('status', 'Pending')), fields=['hold_expires_at'], name='res_hold_expires_idx'),
+        ),
+    ]
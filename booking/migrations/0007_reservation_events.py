@@ -0,0 +1,76 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_created_events(apps, schema_editor):
+    """Start the log with one "created" event per existing reservation so replays see them."""
+    Reservation = apps.get_model("booking", "Reservation")
+    ReservationEvent = apps.get_model("booking", "ReservationEvent")
+    batch = []
+    for r in Reservation.objects.order_by("booking_id").iterator(chunk_size=2000):
+        batch.append(ReservationEvent(
+            booking_id=r.booking_id,
+            user_id=r.user_id,
+            room_id=r.room_id,
+            kind="created",
+            payload={
+                "room": r.room_id,
+                "user": r.user_id,
+                "date": r.date.isoformat(),
+                "start": r.start_time.isoformat(),
+                "end": r.end_time.isoformat(),
+                "status": r.status,
+            },
+        ))
+        if len(batch) == 2000:
+            ReservationEvent.objects.bulk_create(batch)
+            batch = []
+    ReservationEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_reservation_holds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventConsumerOffset',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('last_event_id', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReservationEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('booking_id', models.IntegerField()),
+                ('user_id', models.IntegerField()),
+                ('room_id', models.IntegerField()),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('cancelled', 'Cancelled'), ('held', 'Held'), ('confirmed', 'Confirmed'), ('deleted', 'Deleted')], max_length=20)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_id', 'id'], name='event_user_idx'), models.Index(fields=['room_id', 'id'], name='event_room_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RoomDailyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('booked_minutes', models.PositiveIntegerField(default=0)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='booking.room')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room', 'date'), name='unique_room_daily_usage')],
+            },
+        ),
+        migrations.RunPython(backfill_created_events, migrations.RunPython.noop),
+    ]
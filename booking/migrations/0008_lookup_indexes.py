@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Expression indexes for the autocomplete lookups. Django compiles
+# `col__istartswith` to UPPER(col::text) LIKE UPPER(%s) on Postgres, so the
+# indexes use that exact expression and text_pattern_ops (needed for LIKE
+# prefix scans under a non-C collation). Other databases are skipped.
+LOOKUP_INDEXES = [
+    ("auth_user_username_upper_idx", "auth_user", "username"),
+    ("auth_user_email_upper_idx", "auth_user", "email"),
+    ("room_name_upper_idx", "booking_room", "room_name"),
+    ("room_location_upper_idx", "booking_room", "location"),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, table, column in LOOKUP_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" (UPPER("{column}"::text) text_pattern_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in LOOKUP_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('booking', '0007_reservation_events'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
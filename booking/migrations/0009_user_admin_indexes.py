@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# auth_user belongs to django.contrib.auth, so its extra indexes for the
+# /api/users/ filters and orderings are created with plain SQL here.
+# (username already has a unique index; the prefix filter uses the
+# UPPER(username) index from 0008 on Postgres.)
+USER_INDEXES = [
+    ("auth_user_date_joined_idx", "date_joined, id"),
+    ("auth_user_staff_username_idx", "is_staff, username"),
+    ("auth_user_staff_joined_idx", "is_staff, date_joined"),
+]
+
+
+def create_indexes(apps, schema_editor):
+    for name, columns in USER_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "auth_user" ({columns})')
+
+
+def drop_indexes(apps, schema_editor):
+    for name, _ in USER_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('booking', '0008_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
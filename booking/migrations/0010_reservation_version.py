@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0009_user_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
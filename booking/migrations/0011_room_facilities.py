@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Trigram indexes for /api/rooms/?q= (icontains compiles to UPPER(col::text) LIKE).
+TRIGRAM_INDEXES = [
+    ("room_name_trgm_idx", "room_name"),
+    ("room_location_trgm_idx", "location"),
+    ("room_facilities_trgm_idx", "facilities"),
+]
+
+
+def fill_facility_tags(apps, schema_editor):
+    Room = apps.get_model("booking", "Room")
+    RoomFacility = apps.get_model("booking", "RoomFacility")
+    tags = []
+    for room in Room.objects.only("room_id", "facilities").iterator(chunk_size=2000):
+        names = {
+            " ".join(name.split()).lower()[:100].rstrip()  # RoomFacility.name max_length
+            for name in (room.facilities or "").split(",") if name.strip()
+        }
+        tags.extend(RoomFacility(room_id=room.room_id, name=name) for name in names)
+    RoomFacility.objects.bulk_create(tags, batch_size=2000)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "booking_room" '
+            f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0010_reservation_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomFacility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facility_tags', to='booking.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', 'room'], name='room_facility_name_idx')],
+                'constraints': [models.UniqueConstraint(fields=('room', 'name'), name='unique_room_facility')],
+            },
+        ),
+        migrations.RunPython(fill_facility_tags, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:24
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def fill_previous_ids(apps, schema_editor):
+    ReservationEvent = apps.get_model("booking", "ReservationEvent")
+    moved = ReservationEvent.objects.filter(
+        Q(payload__previous__has_key="user") | Q(payload__previous__has_key="room")
+    )
+    batch = []
+    for event in moved.only("payload").iterator(chunk_size=2000):
+        event.previous_user_id = event.payload["previous"].get("user")
+        event.previous_room_id = event.payload["previous"].get("room")
+        batch.append(event)
+        if len(batch) == 2000:
+            ReservationEvent.objects.bulk_update(batch, ["previous_user_id", "previous_room_id"])
+            batch = []
+    ReservationEvent.objects.bulk_update(batch, ["previous_user_id", "previous_room_id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0012_calendar_feeds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservationevent',
+            name='previous_room_id',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reservationevent',
+            name='previous_user_id',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(fill_previous_ids, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='reservationevent',
+            index=models.Index(condition=models.Q(('previous_user_id__isnull', False)), fields=['previous_user_id', 'id'], name='event_prev_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservationevent',
+            index=models.Index(condition=models.Q(('previous_room_id__isnull', False)), fields=['previous_room_id', 'id'], name='event_prev_room_idx'),
+        ),
+    ]
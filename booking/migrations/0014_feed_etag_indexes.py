@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0013_feed_etag_sources'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='reservationevent',
+            name='event_prev_user_idx',
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['room', 'updated_at'], name='res_room_updated_idx'),
+        ),
+    ]
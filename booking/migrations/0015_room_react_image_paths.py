@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:05
+
+from django.db import migrations, models
+
+
+def add_column_if_missing(apps, schema_editor):
+    # Room.react_image_paths was in the model before it had a migration, so
+    # deployed databases already have the column; only create it elsewhere.
+    Room = apps.get_model("booking", "Room")
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        columns = {
+            column.name for column in connection.introspection.get_table_description(cursor, Room._meta.db_table)
+        }
+    if "react_image_paths" not in columns:
+        schema_editor.add_field(Room, Room._meta.get_field("react_image_paths"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0014_feed_etag_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='room',
+                    name='react_image_paths',
+                    field=models.CharField(blank=True, max_length=255, null=True),
+                ),
+            ],
+        ),
+        migrations.RunPython(add_column_if_missing, migrations.RunPython.noop),
+    ]
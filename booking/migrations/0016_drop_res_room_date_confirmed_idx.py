@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0015_room_react_image_paths'),
+    ]
+
+    operations = [
+        # Overlap checks and audit_overlaps use res_room_starts_idx now
+        migrations.RemoveIndex(
+            model_name='reservation',
+            name='res_room_date_confirmed_idx',
+        ),
+    ]
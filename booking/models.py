@@ -1,7 +1,13 @@
 # Create your models here.
-from django.db import models
+import secrets
+from datetime import datetime, time, timedelta
+
+from django.db import connections, models, router
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .utils import FACILITY_NAME_MAX_LENGTH
 
 
 # Extend user info if needed
@@ -30,11 +36,113 @@ class Room(models.Model):
     room_type = models.CharField(max_length=50, choices=ROOM_TYPES)
     imagePath = models.CharField(max_length=255, blank=True, null=True)  # path or URL
     react_image_paths = models.CharField(max_length=255, blank=True, null=True)
+    # Part of the calendar feed ETags (room names appear in every event)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"Room {self.room_id} - {self.location}"
 
 
+# Normalised Room.facilities entries (see utils.parse_facilities), kept in
+# sync by the post_save signal; /api/rooms/?facilities= filters on these.
+class RoomFacility(models.Model):
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="facility_tags")
+    name = models.CharField(max_length=FACILITY_NAME_MAX_LENGTH)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["room", "name"], name="unique_room_facility"),
+        ]
+        indexes = [
+            models.Index(fields=["name", "room"], name="room_facility_name_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} (room {self.room_id})"
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def timestamp_range(day, start_time, end_time):
+    """Timezone-aware (starts_at, ends_at) for a booking on `day`."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(day, start_time), tz),
+        timezone.make_aware(datetime.combine(day, end_time), tz),
+    )
+
+
+class ReservationQuerySet(models.QuerySet):
+    def overlapping(self, starts_at, ends_at):
+        """
+        Bookings intersecting [starts_at, ends_at). A booking never spans more
+        than a day (start_time < end_time on one date), so the extra lower
+        bound keeps this a bounded range scan on starts_at.
+        """
+        return self.filter(
+            starts_at__gt=starts_at - timedelta(days=1),
+            starts_at__lt=ends_at,
+            ends_at__gt=starts_at,
+        )
+
+    def blocking(self, now=None):
+        """Bookings that occupy their slot: confirmed ones and unexpired holds."""
+        return self.filter(
+            models.Q(status="Confirmed")
+            | models.Q(status="Pending", hold_expires_at__gt=now or timezone.now())
+        )
+
+    def clashing(self, room_id, day, start_time, end_time, exclude=None):
+        """Blocking bookings in `room_id` that overlap the slot, other than booking `exclude`."""
+        qs = self.filter(room_id=room_id).blocking().overlapping(*timestamp_range(day, start_time, end_time))
+        if exclude is not None:
+            qs = qs.exclude(booking_id=exclude)
+        return qs
+
+    def starting_on(self, day):
+        """Bookings starting on `day` (local time), as one range on starts_at."""
+        return self.filter(starts_at__gte=start_of_day(day), starts_at__lt=start_of_day(day + timedelta(days=1)))
+
+    def listing(self, user=None):
+        """
+        Bookings in listing order (date, start_time) with what the listings
+        show joined in; only `user`'s own when given.
+        """
+        if user is None:
+            return self.select_related("room", "user").order_by("date", "start_time")
+        return self.select_related("room").filter(user=user).order_by("date", "start_time")
+
+
+class ReservationManager(models.Manager.from_queryset(ReservationQuerySet)):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create skips save(), so fill in the derived timestamps here
+        objs = list(objs)
+        for obj in objs:
+            obj.set_timestamps()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def delete_rows(self, booking_ids):
+        """
+        Plain DELETE ... WHERE booking_id IN (...) for bulk jobs: no Collector
+        and no post_delete, so no tombstones or events are written (callers
+        write their own, if any). Returns the number of rows deleted.
+        """
+        if not booking_ids:
+            return 0
+        connection = connections[self._db or router.db_for_write(self.model)]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        placeholders = ", ".join(["%s"] * len(booking_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE booking_id IN ({placeholders})", list(booking_ids))
+            return cursor.rowcount
+
+
+class StaleReservationError(Exception):
+    """Reservation.save() found the row at a different version than the one edited."""
+
+
 # Booking model
 class Reservation(models.Model):
     STATUS_CHOICES = [
@@ -51,22 +159,90 @@ class Reservation(models.Model):
     date = models.DateField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Pending")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Delta sync cursor; bulk .update() calls must set it explicitly.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Optimistic concurrency: save() only writes if the row is still at this
+    # version, then bumps it. Bulk .update() calls must bump it too.
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # date + start_time/end_time as single timezone-aware columns, kept in
+    # sync by save(); window and overlap queries filter on these.
+    starts_at = models.DateTimeField(editable=False)
+    ends_at = models.DateTimeField(editable=False)
+    # Set while a Pending booking is a tentative hold (see /api/reservations/hold/)
+    hold_expires_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = ReservationManager()
 
     class Meta:
         constraints = [
             models.CheckConstraint(check=models.Q(start_time__lt=models.F("end_time")),
                                    name="check_start_before_end"),
         ]
+        indexes = [
+            # Staff listings: ORDER BY date, start_time
+            models.Index(fields=["date", "start_time"], name="res_date_start_idx"),
+            # Per-user listings (/api/reservations/my/, manage_bookings)
+            models.Index(fields=["user", "date", "start_time"], name="res_user_date_start_idx"),
+            # /api/reservations/changes/ for a single user, user calendar feed ETag
+            models.Index(fields=["user", "updated_at"], name="res_user_updated_idx"),
+            # Room calendar feed ETag
+            models.Index(fields=["room", "updated_at"], name="res_room_updated_idx"),
+            # Time window filters (listings, send_reminders)
+            models.Index(fields=["starts_at"], name="res_starts_at_idx"),
+            models.Index(fields=["user", "starts_at"], name="res_user_starts_idx"),
+            # Overlap checks in clean() (confirmed bookings and holds)
+            models.Index(fields=["room", "starts_at"], name="res_room_starts_idx"),
+            # expire_holds sweeper
+            models.Index(fields=["hold_expires_at"], name="res_hold_expires_idx",
+                         condition=models.Q(status="Pending")),
+        ]
+
+    def set_timestamps(self):
+        self.starts_at, self.ends_at = timestamp_range(self.date, self.start_time, self.end_time)
+
+    def save(self, *args, **kwargs):
+        self.set_timestamps()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            extra = {"version"}
+            if {"date", "start_time", "end_time"} & set(update_fields):
+                extra |= {"starts_at", "ends_at"}
+            kwargs["update_fields"] = {*update_fields, *extra}
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+
+        # Set `version` to the one the caller edited (forms/If-Match) before saving
+        self._expected_version = self.version
+        self.version += 1
+        try:
+            super().save(*args, **kwargs)
+        except StaleReservationError:
+            self.version = self._expected_version
+            raise
+        finally:
+            del self._expected_version
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # UPDATE ... WHERE booking_id = %s AND version = %s
+        expected = getattr(self, "_expected_version", None)
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        updated = super()._do_update(
+            base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update
+        )
+        if not updated and base_qs.filter(pk=pk_val).exists():
+            raise StaleReservationError(
+                f"Reservation {pk_val} was changed by someone else (expected version {expected})."
+            )
+        return updated
 
     def clean(self):
         """Custom validation to prevent overlapping bookings."""
-        overlapping = Reservation.objects.filter(
-            room=self.room,
-            date=self.date,
-            status="Confirmed"
-        ).exclude(booking_id=self.booking_id).filter(
-            start_time__lt=self.end_time,
-            end_time__gt=self.start_time
+        if None in (self.room_id, self.date, self.start_time, self.end_time):
+            return  # field errors are reported by clean_fields()
+        overlapping = Reservation.objects.clashing(
+            self.room_id, self.date, self.start_time, self.end_time, exclude=self.booking_id,
         )
         if overlapping.exists():
             raise ValidationError("This room is already booked for the selected time range.")
@@ -74,3 +250,115 @@ class Reservation(models.Model):
     def __str__(self):
         return f"Booking {self.booking_id} - Room {self.room.room_id} by {self.user.username}"
 
+
+
+# Left behind when a Reservation is deleted so delta sync clients can drop it
+class ReservationTombstone(models.Model):
+    booking_id = models.IntegerField()
+    user_id = models.IntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_idx"),
+            models.Index(fields=["user_id", "deleted_at"], name="tombstone_user_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"Deleted booking {self.booking_id}"
+
+
+# Past bookings moved out of Reservation by `manage.py archive_reservations`
+class ReservationArchive(models.Model):
+    booking_id = models.IntegerField(primary_key=True)  # same id as the original Reservation
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="archived_bookings")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_bookings")
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=Reservation.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date", "start_time"], name="res_archive_date_start_idx"),
+            models.Index(fields=["user", "date"], name="res_archive_user_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"Archived booking {self.booking_id} - Room {self.room_id} on {self.date}"
+
+
+# Append-only log of reservation changes (see booking/events.py)
+class ReservationEvent(models.Model):
+    KIND_CHOICES = [
+        ("created", "Created"),
+        ("updated", "Updated"),
+        ("cancelled", "Cancelled"),
+        ("held", "Held"),
+        ("confirmed", "Confirmed"),
+        ("deleted", "Deleted"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)  # consumer cursor
+    booking_id = models.IntegerField()
+    user_id = models.IntegerField()
+    room_id = models.IntegerField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict)
+    # Set when an update moved the booking off another owner/room (the room
+    # calendar feed's ETag follows previous_room_id)
+    previous_user_id = models.IntegerField(null=True, blank=True)
+    previous_room_id = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user_id", "id"], name="event_user_idx"),
+            models.Index(fields=["room_id", "id"], name="event_room_idx"),
+            models.Index(fields=["previous_room_id", "id"], name="event_prev_room_idx",
+                         condition=models.Q(previous_room_id__isnull=False)),
+        ]
+
+    def __str__(self):
+        return f"Event {self.id}: booking {self.booking_id} {self.kind}"
+
+
+# How far each event consumer has read
+class EventConsumerOffset(models.Model):
+    name = models.CharField(max_length=100, primary_key=True)
+    last_event_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_event_id}"
+
+
+# Derived from the event log by the "room_daily_usage" consumer
+class RoomDailyUsage(models.Model):
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="daily_usage")
+    date = models.DateField()
+    bookings = models.PositiveIntegerField(default=0)
+    booked_minutes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["room", "date"], name="unique_room_daily_usage"),
+        ]
+
+    def __str__(self):
+        return f"Room {self.room_id} on {self.date}: {self.bookings} bookings"
+
+
+def new_feed_token():
+    return secrets.token_urlsafe(24)
+
+
+# Secret URL token for a user's iCalendar feed (see booking/ical.py)
+class CalendarFeed(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="calendar_feed")
+    token = models.CharField(max_length=64, unique=True, default=new_feed_token)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Calendar feed for {self.user.username}"
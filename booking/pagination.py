@@ -0,0 +1,14 @@
+# booking/pagination.py
+
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Keyset pagination for /api/users/: each page is one indexed range scan
+    however deep the client pages, and no COUNT(*) is run.
+    """
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "username"
@@ -0,0 +1,150 @@
+# booking/provisioning.py
+
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import DatabaseError, transaction
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import Profile
+
+TRUE_VALUES = {"1", "true", "yes", "y"}
+
+# CSV columns stored as-is, checked against their model field's max_length
+USER_COLUMNS = ["username", "first_name", "last_name", "email"]
+PROFILE_COLUMNS = ["phone"]
+
+
+def import_users(lines, chunk_size=500, workers=1, progress=None):
+    """
+    Creates users (and their profiles) from CSV text lines.
+
+    Expected header (only `username` is required):
+        username,email,first_name,last_name,phone,password,is_staff
+
+    Rows are read lazily and validated/inserted `chunk_size` at a time with
+    bulk_create. Passwords are hashed in a pool of `workers` processes; rows
+    without a password get an unusable password and an invite token
+    (uid + password reset token) in the result.
+
+    `progress`, if given, is called with the running result after each chunk.
+    Returns {"processed", "created", "failed": [...], "invites": [...]}.
+    """
+    reader = csv.DictReader(lines)
+    rows = ((reader.line_num, row) for row in reader)
+    result = {"processed": 0, "created": 0, "failed": [], "invites": []}
+    seen = set()
+
+    executor = ProcessPoolExecutor(workers, initializer=django.setup) if workers > 1 else None
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            _import_chunk(chunk, seen, executor, result)
+            if progress:
+                progress(result)
+    finally:
+        if executor:
+            executor.shutdown()
+    return result
+
+
+def _import_chunk(chunk, seen, executor, result):
+    result["processed"] += len(chunk)
+    usernames = [(row.get("username") or "").strip() for _, row in chunk]
+    taken = set(User.objects.filter(username__in=usernames).values_list("username", flat=True))
+
+    valid = []
+    for (line, row), username in zip(chunk, usernames):
+        errors = _validate_row(row, username, taken | seen)
+        if errors:
+            result["failed"].append({"line": line, "username": username, "errors": errors})
+            continue
+        seen.add(username)
+        valid.append((line, row, username))
+
+    if not valid:
+        return
+
+    passwords = [row.get("password") or None for _, row, _ in valid]
+    hashes = list(executor.map(make_password, passwords, chunksize=50) if executor
+                  else map(make_password, passwords))
+
+    users = [
+        User(
+            username=username,
+            email=(row.get("email") or "").strip(),
+            first_name=(row.get("first_name") or "").strip(),
+            last_name=(row.get("last_name") or "").strip(),
+            is_staff=(row.get("is_staff") or "").strip().lower() in TRUE_VALUES,
+            password=password_hash,
+        )
+        for (_, row, username), password_hash in zip(valid, hashes)
+    ]
+
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            Profile.objects.bulk_create([
+                Profile(user=user, phone=(row.get("phone") or "").strip())
+                for user, (_, row, _) in zip(users, valid)
+            ])
+    except DatabaseError as exc:
+        # The whole chunk is rolled back; earlier and later chunks still import
+        for line, _, username in valid:
+            result["failed"].append({"line": line, "username": username, "errors": {"__all__": [str(exc)]}})
+        return
+
+    result["created"] += len(users)
+    for user, password in zip(users, passwords):
+        if password is None:
+            result["invites"].append({
+                "username": user.username,
+                "uid": urlsafe_base64_encode(force_bytes(user.pk)),
+                "token": default_token_generator.make_token(user),
+            })
+
+
+def _validate_row(row, username, taken):
+    errors = {}
+
+    for model, columns in ((User, USER_COLUMNS), (Profile, PROFILE_COLUMNS)):
+        for column in columns:
+            max_length = model._meta.get_field(column).max_length
+            if len((row.get(column) or "").strip()) > max_length:
+                errors.setdefault(column, []).append(f"Ensure this field has no more than {max_length} characters.")
+
+    if not username:
+        errors.setdefault("username", []).append("This field is required.")
+    elif username in taken:
+        errors.setdefault("username", []).append("A user with that username already exists.")
+    elif "username" not in errors:
+        try:
+            User.username_validator(username)
+        except ValidationError as exc:
+            errors.setdefault("username", []).extend(exc.messages)
+
+    email = (row.get("email") or "").strip()
+    if email and "email" not in errors:
+        try:
+            validate_email(email)
+        except ValidationError as exc:
+            errors.setdefault("email", []).extend(exc.messages)
+
+    if row.get("password"):
+        try:
+            validate_password(row["password"])
+        except ValidationError as exc:
+            errors.setdefault("password", []).extend(exc.messages)
+
+    return errors
@@ -0,0 +1,30 @@
+# booking/renderers.py
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to DRF's stdlib renderer
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that serializes with orjson when it is installed.
+    Dates and times come out as ISO 8601 like DRF's fields produce; anything
+    orjson can't handle natively (Decimal, lazy strings, ...) goes through
+    DRF's JSONEncoder. Indented output (browsable API) uses the stdlib path.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        return orjson.dumps(
+            data,
+            default=JSONEncoder().default,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+        )
@@ -0,0 +1,93 @@
+# booking/search.py
+
+import re
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Room, RoomFacility
+
+WORD = re.compile(r"\w+")
+
+
+def terms(text):
+    return [word.lower() for word in WORD.findall(text or "")]
+
+
+class RoomSearchIndex:
+    """
+    In-memory inverted index over room name, location and facilities, used
+    for ?q= where the database has no trigram index. A query term matches
+    any indexed word containing it (like icontains on Postgres); every term
+    must match. Postings are keyed by every suffix of every word, kept
+    sorted, so the words containing a term are one bisect away: the run of
+    keys starting with it.
+    """
+
+    def __init__(self, rooms):
+        postings = defaultdict(set)
+        for room_id, *fields in rooms:
+            for field in fields:
+                for word in terms(field):
+                    for start in range(len(word)):
+                        postings[word[start:]].add(room_id)
+        self.keys = sorted(postings)
+        self.postings = [postings[key] for key in self.keys]
+        self.built_at = time.monotonic()
+
+    def lookup(self, term):
+        ids = set()
+        index = bisect_left(self.keys, term)
+        while index < len(self.keys) and self.keys[index].startswith(term):
+            ids |= self.postings[index]
+            index += 1
+        return ids
+
+    def search(self, query):
+        matched = None
+        for term in terms(query):
+            ids = self.lookup(term)
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                return set()
+        return matched if matched is not None else set()
+
+
+_index = None
+
+
+def room_index():
+    """Process-wide index, rebuilt after ROOM_SEARCH_INDEX_TTL seconds or a room change."""
+    global _index
+    if _index is None or time.monotonic() - _index.built_at > settings.ROOM_SEARCH_INDEX_TTL:
+        _index = RoomSearchIndex(Room.objects.values_list("room_id", "room_name", "location", "facilities"))
+    return _index
+
+
+def invalidate_room_index():
+    global _index
+    _index = None
+
+
+def search_rooms(queryset, q="", facilities=()):
+    """
+    Narrows a Room queryset to rooms tagged with every facility in
+    `facilities` (RoomFacility index) and matching the text query `q`
+    (trigram-indexed icontains on Postgres, RoomSearchIndex elsewhere).
+    """
+    for name in facilities:
+        queryset = queryset.filter(room_id__in=RoomFacility.objects.filter(name=name).values("room_id"))
+
+    if q.strip():
+        if connection.vendor == "postgresql":
+            for term in terms(q):
+                queryset = queryset.filter(
+                    Q(room_name__icontains=term) | Q(location__icontains=term) | Q(facilities__icontains=term)
+                )
+        else:
+            queryset = queryset.filter(room_id__in=room_index().search(q))
+    return queryset
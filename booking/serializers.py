@@ -48,8 +48,10 @@ class ReservationSerializer(serializers.ModelSerializer):
             "start_time",
             "end_time",
             "status",
+            "hold_expires_at",
+            "version",
         ]
-        read_only_fields = ["booking_id"]
+        read_only_fields = ["booking_id", "hold_expires_at", "version"]
 
         def validate_date(self, value):
             if value < date.today():
@@ -59,6 +61,44 @@ class ReservationSerializer(serializers.ModelSerializer):
             return value
 
 
+class ValuesRowSerializer:
+    """
+    Read-only fast path for list endpoints. Rows are built straight from
+    .values_list() tuples using the precomputed `fields` mapping
+    (output key -> ORM lookup), skipping per-field to_representation.
+    Dates/times stay native; the JSON renderer formats them like DRF does.
+    """
+    fields = {}
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    @property
+    def data(self):
+        keys = tuple(self.fields)
+        return [dict(zip(keys, row)) for row in self.queryset.values_list(*self.fields.values())]
+
+
+class ReservationRowSerializer(ValuesRowSerializer):
+    fields = {
+        "booking_id": "booking_id",
+        "room": "room_id",
+        "room_name": "room__room_name",
+        "user": "user_id",
+        "username": "user__username",
+        "date": "date",
+        "start_time": "start_time",
+        "end_time": "end_time",
+        "status": "status",
+        "hold_expires_at": "hold_expires_at",
+        "version": "version",
+    }
+
+
+class RoomRowSerializer(ValuesRowSerializer):
+    fields = {name: name for name in RoomSerializer.Meta.fields}
+
+
 class AdminUserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False, allow_blank=True)
     phone = serializers.CharField(source="profile.phone", required=False, allow_blank=True, allow_null=True)
@@ -93,3 +133,19 @@ class AdminUserSerializer(serializers.ModelSerializer):
         if profile_data:
             Profile.objects.update_or_create(user=instance, defaults={"phone": profile_data.get("phone", "")})
         return instance
+
+
+class AllocationRequestSerializer(serializers.Serializer):
+    """One meeting in a POST /api/reservations/allocate/ batch."""
+    id = serializers.CharField(required=False, allow_blank=True)
+    date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    attendees = serializers.IntegerField(min_value=1)
+    room_type = serializers.ChoiceField(choices=Room.ROOM_TYPES, required=False, allow_blank=True)
+    facilities = serializers.ListField(child=serializers.CharField(), required=False)
+
+    def validate(self, attrs):
+        if attrs["start_time"] >= attrs["end_time"]:
+            raise serializers.ValidationError("start_time must be before end_time.")
+        return attrs
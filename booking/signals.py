@@ -0,0 +1,35 @@
+# booking/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .events import record_event
+from .models import Reservation, ReservationTombstone, Room, RoomFacility
+from .search import invalidate_room_index
+from .utils import parse_facilities
+
+
+@receiver(post_delete, sender=Reservation)
+def leave_tombstone(sender, instance, **kwargs):
+    """Covers API destroy, delete_reservation and ORM cascades from Room/User."""
+    ReservationTombstone.objects.create(booking_id=instance.booking_id, user_id=instance.user_id)
+    record_event(instance, "deleted")
+
+
+@receiver(post_save, sender=Room)
+def sync_facility_tags(sender, instance, raw=False, **kwargs):
+    """Keeps RoomFacility rows in step with the free-text Room.facilities."""
+    invalidate_room_index()
+    if raw:
+        return
+    names = parse_facilities(instance.facilities or "")
+    instance.facility_tags.exclude(name__in=names).delete()
+    existing = set(instance.facility_tags.values_list("name", flat=True))
+    RoomFacility.objects.bulk_create(
+        [RoomFacility(room=instance, name=name) for name in names - existing]
+    )
+
+
+@receiver(post_delete, sender=Room)
+def drop_room_from_index(sender, instance, **kwargs):
+    invalidate_room_index()
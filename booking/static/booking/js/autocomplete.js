@@ -0,0 +1,77 @@
+// booking/static/booking/js/autocomplete.js
+// Search box for <input data-autocomplete-url> (see booking/widgets.py).
+// The id input becomes hidden and a <select> is filled from the lookup URL
+// as the user types; without JavaScript the plain id input is used.
+
+(function () {
+    function debounce(fn, wait) {
+        let timer;
+        return function (...args) {
+            clearTimeout(timer);
+            timer = setTimeout(() => fn.apply(this, args), wait);
+        };
+    }
+
+    function attach(input) {
+        const select = document.createElement("select");
+        select.className = input.className;
+        select.add(new Option(input.dataset.autocompleteEmpty || "", ""));
+        if (input.value) {
+            select.add(new Option(input.dataset.autocompleteLabel || input.value, input.value, true, true));
+        }
+        select.addEventListener("change", () => {
+            input.value = select.value;
+        });
+
+        const search = document.createElement("input");
+        search.type = "search";
+        search.className = input.className;
+        search.placeholder = "Type to search…";
+        search.autocomplete = "off";
+
+        const selected = input.parentNode.querySelector("[data-autocomplete-selected]");
+        if (selected) {
+            selected.remove();
+        }
+        input.parentNode.insertBefore(search, input);
+        input.parentNode.insertBefore(select, input);
+        input.type = "hidden";
+
+        const lookup = debounce(async function () {
+            const term = search.value.trim();
+            if (!term) {
+                return;
+            }
+            const url = new URL(input.dataset.autocompleteUrl, window.location.origin);
+            url.searchParams.set("q", term);
+            const response = await fetch(url, { credentials: "same-origin" });
+            if (!response.ok) {
+                return;
+            }
+            const { results } = await response.json();
+
+            const current = select.value;
+            // Keep the empty option and the current selection, replace the rest
+            Array.from(select.options).forEach((option) => {
+                if (option.value && option.value !== current) {
+                    option.remove();
+                }
+            });
+            results.forEach((item) => {
+                if (String(item.id) !== current) {
+                    select.add(new Option(item.text, item.id));
+                }
+            });
+            if (!current && results.length) {
+                select.value = String(results[0].id);
+            }
+            input.value = select.value;
+        }, 250);
+
+        search.addEventListener("input", lookup);
+    }
+
+    document.addEventListener("DOMContentLoaded", function () {
+        document.querySelectorAll("input[data-autocomplete-url]").forEach(attach);
+    });
+})();
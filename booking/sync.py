@@ -0,0 +1,84 @@
+# booking/sync.py
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+from django.utils import timezone
+
+# Rows committed slightly out of timestamp order can appear "in the past";
+# a caught-up client's cursor never moves closer to now than this, so those
+# rows are sent again (clients upsert by booking_id).
+CURSOR_LAG = timedelta(seconds=2)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp, booking_id):
+    micros = (timestamp - EPOCH) // timedelta(microseconds=1)
+    return f"{micros}-{booking_id}"
+
+
+def decode_cursor(cursor):
+    try:
+        micros, booking_id = cursor.split("-")
+        return EPOCH + timedelta(microseconds=int(micros)), int(booking_id)
+    except ValueError:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+
+
+def _after(field, position):
+    timestamp, booking_id = position
+    return Q(**{f"{field}__gt": timestamp}) | Q(**{field: timestamp, "booking_id__gt": booking_id})
+
+
+def changes_since(reservations, tombstones, cursor=None, limit=500):
+    """
+    One page of changes after `cursor`, ordered by (timestamp, booking_id).
+
+    `reservations` / `tombstones` are the querysets the caller may see.
+    Without a cursor this is a full snapshot and tombstones are skipped.
+    A booking that changed more than once in the page is reported once, as
+    its latest change (e.g. reassigned away and back: updated, not deleted).
+    Returns (updated reservations, deleted booking ids, next cursor, has_more).
+    """
+    position = decode_cursor(cursor) if cursor else None
+
+    if position:
+        reservations = reservations.filter(_after("updated_at", position))
+        tombstones = tombstones.filter(_after("deleted_at", position))
+        deleted_rows = list(tombstones.order_by("deleted_at", "booking_id")[:limit + 1])
+    else:
+        deleted_rows = []
+    updated_rows = list(reservations.order_by("updated_at", "booking_id")[:limit + 1])
+
+    merged = sorted(
+        [(r.updated_at, r.booking_id, r) for r in updated_rows]
+        + [(t.deleted_at, t.booking_id, t) for t in deleted_rows],
+        key=lambda item: item[:2],
+    )
+    has_more = len(merged) > limit
+    page = merged[:limit]
+    horizon = timezone.now() - CURSOR_LAG
+
+    if not page:
+        return [], [], cursor or encode_cursor(horizon, 0), False
+
+    last_timestamp, last_id, _ = page[-1]
+    if not has_more and last_timestamp > horizon:
+        next_cursor = encode_cursor(horizon, 0)
+        if position and decode_cursor(next_cursor) < position:
+            next_cursor = cursor
+    else:
+        next_cursor = encode_cursor(last_timestamp, last_id)
+
+    latest = {}
+    for _, booking_id, obj in page:
+        latest.pop(booking_id, None)
+        latest[booking_id] = obj
+    updated = [obj for obj in latest.values() if not hasattr(obj, "deleted_at")]
+    deleted = [obj.booking_id for obj in latest.values() if hasattr(obj, "deleted_at")]
+    return updated, deleted, next_cursor, has_more
@@ -1,3 +1,1213 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import re
+import runpy
+import tempfile
+from datetime import date, time, timedelta
+from importlib.util import find_spec
+from io import StringIO
+from pathlib import Path
+from time import perf_counter
+from types import SimpleNamespace
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.contrib.messages import get_messages
+from django.contrib.sessions.models import Session
+from django.contrib.staticfiles import finders
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DataError, OperationalError, connection, transaction
+from django.db.models import F
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .allocation import allocate
+from .api_views import ReservationViewSet
+from .archive import archive_batch
+from .availability import MANIFEST_NAME, PUBLISH_DIR, publish
+from .cascade import cancel_reservations
+from .provisioning import import_users
+from .renderers import ORJSONRenderer
+from .management.commands.benchmark_allocation import benchmark_requests, benchmark_rooms
+from .management.commands.send_reminders import reservations_to_remind
+from .search import RoomSearchIndex
+from .views import STALE_EDIT_MESSAGE
+from .db_routers import PIN_COOKIE, ReplicaRouter, end_request, replica_reads, start_request
+from .events import CONSUMERS, EVENT_GAP_TIMEOUT, consume, events_after, record_event, record_update, snapshot
+from .forms import ReservationForm
+from .hashers import TunedPBKDF2PasswordHasher
+from .middleware import CompressionMiddleware, accepted_encodings
+from .models import (
+    CalendarFeed, Profile, Room, Reservation, ReservationEvent, ReservationTombstone, RoomDailyUsage,
+    RoomFacility, StaleReservationError,
+)
+
+
+def seed_reservations(rooms=5, users=20, days=60):
+    """Bulk-inserts enough bookings that a table scan would show up in plans."""
+    room_objs = Room.objects.bulk_create([
+        Room(room_name=f"Room {i}", capacity=10, location=f"Level {i}", room_type="Huddle")
+        for i in range(rooms)
+    ])
+    user_objs = User.objects.bulk_create([User(username=f"user{i}") for i in range(users)])
+    start = date.today()
+    statuses = ["Confirmed", "Confirmed", "Cancelled", "Pending"]
+    Reservation.objects.bulk_create([
+        Reservation(
+            room=room_objs[(d + h) % rooms],
+            user=user_objs[(d * 8 + h) % users],
+            date=start + timedelta(days=d),
+            start_time=time(8 + h),
+            end_time=time(9 + h),
+            status=statuses[(d + h) % len(statuses)],
+        )
+        for d in range(days)
+        for h in range(8)
+    ])
+    return room_objs, user_objs
+
+
+class ReservationQueryPlanTests(TestCase):
+    """
+    Runs EXPLAIN on the hot reservation querysets, built by the same code the
+    views and commands use. Filtered ones must be an index search (a bounded
+    range), full listings at least an index walk in listing order.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rooms, cls.users = seed_reservations()
+        cls.staff = User.objects.create(username="staff", is_staff=True)
+
+    def explain(self, queryset):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # Tiny test tables always favour a seq scan; only accept one if no index applies.
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            elif connection.vendor == "sqlite":
+                cursor.execute("ANALYZE")
+            else:
+                self.skipTest(f"No plan check for {connection.vendor}")
+        return queryset.explain()
+
+    def assertIndexWalk(self, queryset):
+        plan = self.explain(queryset)
+        seq_scan = {
+            "postgresql": r"Seq Scan on booking_reservation",
+            "sqlite": r"SCAN booking_reservation(?! USING)",
+        }[connection.vendor]
+        self.assertIsNone(re.search(seq_scan, plan), msg=f"Sequential scan in plan:\n{plan}")
+
+    def assertIndexSearch(self, queryset):
+        plan = self.explain(queryset)
+        if connection.vendor == "postgresql":
+            self.assertIsNone(re.search(r"Seq Scan on booking_reservation", plan), msg=plan)
+            self.assertIn("Index Cond", plan, msg=f"No index condition in plan:\n{plan}")
+        else:
+            self.assertIsNone(re.search(r"SCAN booking_reservation", plan), msg=f"Full scan in plan:\n{plan}")
+            self.assertIn("SEARCH booking_reservation", plan)
+
+    def viewset_queryset(self, user, **params):
+        view = ReservationViewSet()
+        view.request = SimpleNamespace(user=user, query_params=params)
+        return view.get_queryset()
+
+    def test_api_staff_listing(self):
+        # ReservationViewSet.list for staff / views.manage_reservations: the whole table, in order
+        self.assertIndexWalk(self.viewset_queryset(self.staff))
+        self.assertIndexWalk(Reservation.objects.listing())
+
+    def test_api_user_listing(self):
+        # ReservationViewSet.list / .my / views.manage_bookings for a user
+        self.assertIndexSearch(self.viewset_queryset(self.users[0]))
+        self.assertIndexSearch(Reservation.objects.listing(self.users[0]))
+
+    def test_overlap_check(self):
+        # Reservation.clean / api_views.lock_slot
+        self.assertIndexSearch(Reservation.objects.clashing(self.rooms[0].pk, date.today(), time(10), time(12)))
+
+    def test_send_reminders(self):
+        self.assertIndexSearch(reservations_to_remind(date.today() + timedelta(days=1)))
+
+    def test_listing_window(self):
+        # ?from=&to= and ?from= alone on /api/reservations/
+        today, week = date.today().isoformat(), (date.today() + timedelta(days=7)).isoformat()
+        for user in (self.staff, self.users[0]):
+            self.assertIndexSearch(self.viewset_queryset(user, **{"from": today, "to": week}))
+            self.assertIndexSearch(self.viewset_queryset(user, **{"from": week}))
+
+REPLICA_DATABASES = {
+    **settings.DATABASES,
+    "replica": {**settings.DATABASES["default"], "TEST": {"MIRROR": "default"}},
+}
+
+
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.tokens = start_request(pinned=False)
+
+    def tearDown(self):
+        end_request(self.tokens)
+
+    def test_single_database_without_replica(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Room), "default")
+
+    @override_settings(DATABASES=REPLICA_DATABASES)
+    def test_listing_reads_use_replica(self):
+        self.assertEqual(self.router.db_for_read(Room), "default")
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Room), "replica")
+
+    @override_settings(DATABASES=REPLICA_DATABASES)
+    def test_write_pins_request_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Reservation), "default")
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Room), "default")
+
+    @override_settings(DATABASES=REPLICA_DATABASES)
+    def test_pin_cookie_keeps_next_request_on_primary(self):
+        end_request(self.tokens)
+        self.tokens = start_request(pinned=True)
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Room), "default")
+
+    @override_settings(DATABASES=REPLICA_DATABASES)
+    def test_login_sets_pin_cookie(self):
+        User.objects.create_user(username="pinned", password="Password-123")
+        response = self.client.post("/booking/booking/login/", {"username": "pinned", "password": "Password-123"})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+class UserAdminApiTests(TestCase):
+    """/api/users/ cost must not depend on how many users exist."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create(
+            [User(username=f"member{i:05d}", password="!") for i in range(50_000)],
+            batch_size=5000,
+        )
+        Profile.objects.bulk_create(
+            [Profile(user=user, phone=str(i)) for i, user in enumerate(users[:25_000])],
+            batch_size=5000,
+        )
+        cls.staff = User.objects.create(username="staff", is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_list_query_count(self):
+        # One query for the page, profiles included; no COUNT(*)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/users/")
+        self.assertEqual(len(response.data["results"]), 100)
+        self.assertEqual(response.data["results"][0]["phone"], "0")
+
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data["next"])
+        self.assertEqual(response.data["results"][0]["username"], "member00100")
+
+    def test_filters(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/users/", {"username": "member4999", "ordering": "-username"})
+        self.assertEqual([u["username"] for u in response.data["results"]][:2], ["member49999", "member49998"])
+
+        response = self.client.get("/api/users/", {"is_staff": "true"})
+        self.assertEqual([u["username"] for u in response.data["results"]], ["staff"])
+
+        self.assertEqual(self.client.get("/api/users/", {"joined_after": "soon"}).status_code, 400)
+
+
+class ReservationHoldApiTests(TestCase):
+    """Holds, confirmations and API bookings all check the slot under the room lock."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(room_name="Hold Room", capacity=4, location="Level 1", room_type="Huddle")
+        cls.alice = User.objects.create(username="alice")
+        cls.bob = User.objects.create(username="bob")
+
+    def setUp(self):
+        self.slot = {
+            "room": self.room.pk,
+            "date": (date.today() + timedelta(days=1)).isoformat(),
+            "start_time": "10:00",
+            "end_time": "11:00",
+        }
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_hold_then_confirm(self):
+        client = self.client_for(self.bob)
+        response = client.post("/api/reservations/hold/", self.slot)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["status"], "Pending")
+
+        response = client.post(f"/api/reservations/{response.data['booking_id']}/confirm/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "Confirmed")
+
+    def test_hold_blocks_other_holds(self):
+        self.assertEqual(self.client_for(self.bob).post("/api/reservations/hold/", self.slot).status_code, 201)
+        self.assertEqual(self.client_for(self.alice).post("/api/reservations/hold/", self.slot).status_code, 409)
+
+    def test_create_against_live_hold(self):
+        hold = self.client_for(self.bob).post("/api/reservations/hold/", self.slot).data
+        response = self.client_for(self.alice).post("/api/reservations/", {**self.slot, "user": self.alice.pk})
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Reservation.objects.filter(user=self.alice).exists())
+
+        response = self.client_for(self.bob).post(f"/api/reservations/{hold['booking_id']}/confirm/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_expired_hold(self):
+        hold = self.client_for(self.bob).post("/api/reservations/hold/", self.slot).data
+        Reservation.objects.filter(pk=hold["booking_id"]).update(hold_expires_at=timezone.now() - timedelta(seconds=1))
+
+        # An expired hold no longer blocks the slot and can't be confirmed
+        self.assertEqual(self.client_for(self.alice).post("/api/reservations/", {**self.slot, "user": self.alice.pk}).status_code, 201)
+        response = self.client_for(self.bob).post(f"/api/reservations/{hold['booking_id']}/confirm/")
+        self.assertEqual(response.status_code, 409)
+
+    def test_confirm_rechecks_slot(self):
+        hold = self.client_for(self.bob).post("/api/reservations/hold/", self.slot).data
+        # Booked over the hold by a path that skipped the checks (e.g. an admin bulk import)
+        Reservation.objects.create(
+            room=self.room, user=self.alice, date=date.fromisoformat(self.slot["date"]),
+            start_time=time(10, 30), end_time=time(11, 30), status="Confirmed",
+        )
+        response = self.client_for(self.bob).post(f"/api/reservations/{hold['booking_id']}/confirm/")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Reservation.objects.get(pk=hold["booking_id"]).status, "Pending")
+
+    def test_update_into_taken_slot(self):
+        client = self.client_for(self.alice)
+        self.assertEqual(client.post("/api/reservations/", {**self.slot, "user": self.alice.pk}).status_code, 201)
+        other = client.post(
+            "/api/reservations/", {**self.slot, "user": self.alice.pk, "start_time": "12:00", "end_time": "13:00"}
+        ).data
+        response = client.patch(f"/api/reservations/{other['booking_id']}/", {"start_time": "10:30"})
+        self.assertEqual(response.status_code, 409)
+
+
+class AutocompleteWidgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(room_name="Widget Room", capacity=4, location="Level 2", room_type="Huddle")
+        cls.user = User.objects.create_user(username="widget", password="Password-123")
+
+    def test_collected_script_is_current(self):
+        # Production serves /static/ from the committed STATIC_ROOT; nothing runs collectstatic
+        for path in ReservationForm().media._js:
+            source = finders.find(path)
+            collected = settings.STATIC_ROOT / path
+            self.assertTrue(collected.exists(), f"{path} missing from STATIC_ROOT, run collectstatic")
+            self.assertEqual(collected.read_bytes(), open(source, "rb").read(), f"{path} is stale in STATIC_ROOT")
+
+    def test_plain_id_input_without_javascript(self):
+        html = ReservationForm(initial={"room": self.room.pk})["room"].as_widget()
+        self.assertIn(f'value="{self.room.pk}"', html)
+        self.assertIn(str(self.room), html)
+
+        self.client.force_login(self.user)
+        response = self.client.post("/booking/booking/make_reservation/", {
+            "room": self.room.pk,
+            "date": (date.today() + timedelta(days=1)).isoformat(),
+            "start_time": "09:00",
+            "end_time": "10:00",
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Reservation.objects.filter(room=self.room, user=self.user).exists())
+
+
+class CalendarFeedEtagTests(TestCase):
+    """A feed's ETag changes whenever its content does, or clients keep a stale calendar."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(room_name="Feed Room", capacity=4, location="Level 3", room_type="Huddle")
+        cls.other_room = Room.objects.create(room_name="Other Room", capacity=4, location="Level 4", room_type="Huddle")
+        cls.owner = User.objects.create(username="owner")
+        cls.other = User.objects.create(username="other")
+        cls.staff = User.objects.create(username="feedstaff", is_staff=True)
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.staff)
+        self.booking = self.api.post("/api/reservations/", {
+            "room": self.room.pk, "user": self.owner.pk,
+            "date": (date.today() + timedelta(days=1)).isoformat(),
+            "start_time": "09:00", "end_time": "10:00",
+        }).data
+        self.owner_feed = f"/api/reservations/calendar/{CalendarFeed.objects.create(user=self.owner).token}.ics"
+        staff_token = CalendarFeed.objects.create(user=self.staff).token
+        self.room_feed = f"/api/reservations/calendar/{staff_token}/rooms/{self.room.pk}.ics"
+
+    def assertFeedChanged(self, path, change):
+        etag = self.client.get(path)["ETag"]
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        change()
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_reassigned_booking_leaves_old_owner_feed(self):
+        body = self.assertFeedChanged(self.owner_feed, lambda: self.api.patch(
+            f"/api/reservations/{self.booking['booking_id']}/", {"user": self.other.pk}
+        ))
+        self.assertNotIn(f"booking-{self.booking['booking_id']}@", body)
+
+    def test_moved_booking_leaves_old_room_feed(self):
+        body = self.assertFeedChanged(self.room_feed, lambda: self.api.patch(
+            f"/api/reservations/{self.booking['booking_id']}/", {"room": self.other_room.pk}
+        ))
+        self.assertNotIn(f"booking-{self.booking['booking_id']}@", body)
+
+    def test_orm_writes_without_events(self):
+        # Admin, shell and data fixes don't go through the event log
+        def create():
+            Reservation.objects.create(room=self.room, user=self.owner, date=date.today() + timedelta(days=2),
+                                       start_time=time(9), end_time=time(10), status="Confirmed")
+        def edit():
+            Reservation.objects.filter(user=self.owner).update(status="Cancelled", updated_at=timezone.now())
+        def delete():
+            Reservation.objects.filter(user=self.owner).delete()
+        for change in (create, edit, delete):
+            for path in (self.owner_feed, self.room_feed):
+                etag = self.client.get(path)["ETag"]
+                change()
+                self.assertNotEqual(self.client.get(path)["ETag"], etag, msg=f"{change.__name__} {path}")
+                create()
+
+    def test_archived_booking_leaves_feeds(self):
+        past = Reservation.objects.create(room=self.room, user=self.owner, date=date.today() - timedelta(days=5),
+                                          start_time=time(9), end_time=time(10), status="Confirmed")
+        for path in (self.owner_feed, self.room_feed):
+            past.pk = None
+            past.save()
+            body = self.assertFeedChanged(path, lambda: archive_batch(date.today()))
+            self.assertNotIn(f"booking-{past.pk}@", body)
+
+    def test_room_rename(self):
+        def rename():
+            self.room.room_name = "Renamed Room"
+            self.room.save()
+        for path in (self.owner_feed, self.room_feed):
+            self.assertIn("Renamed Room", self.assertFeedChanged(path, rename))
+            self.room.room_name = "Feed Room"
+            self.room.save()
+
+
+class ReservationSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(room_name="Sync Room", capacity=4, location="Level 5", room_type="Huddle")
+        cls.owner = User.objects.create(username="syncowner")
+        cls.other = User.objects.create(username="syncother")
+        cls.staff = User.objects.create(username="syncstaff", is_staff=True)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_reassigned_booking_is_deleted_for_previous_owner(self):
+        staff = self.client_for(self.staff)
+        booking = staff.post("/api/reservations/", {
+            "room": self.room.pk, "user": self.owner.pk,
+            "date": (date.today() + timedelta(days=1)).isoformat(),
+            "start_time": "09:00", "end_time": "10:00",
+        }).data
+        owner = self.client_for(self.owner)
+        snapshot = owner.get("/api/reservations/changes/").data
+        staff_cursor = staff.get("/api/reservations/changes/").data["cursor"]
+        self.assertEqual([r["booking_id"] for r in snapshot["updated"]], [booking["booking_id"]])
+
+        staff.patch(f"/api/reservations/{booking['booking_id']}/", {"user": self.other.pk})
+        changes = owner.get("/api/reservations/changes/", {"since": snapshot["cursor"]}).data
+        staff_changes = staff.get("/api/reservations/changes/", {"since": staff_cursor}).data
+        self.assertEqual(changes["deleted"], [booking["booking_id"]])
+        self.assertEqual(changes["updated"], [])
+        # Staff still see the booking, now under its new owner
+        self.assertEqual(staff_changes["deleted"], [])
+        self.assertEqual([r["user"] for r in staff_changes["updated"]], [self.other.pk])
+
+    def book(self, client):
+        return client.post("/api/reservations/", {
+            "room": self.room.pk, "user": self.owner.pk,
+            "date": (date.today() + timedelta(days=1)).isoformat(),
+            "start_time": "09:00", "end_time": "10:00",
+        }).data
+
+    def test_create_update_destroy(self):
+        owner = self.client_for(self.owner)
+        cursor = owner.get("/api/reservations/changes/").data["cursor"]
+        booking = self.book(owner)
+        url = f"/api/reservations/{booking['booking_id']}/"
+
+        changes = owner.get("/api/reservations/changes/", {"since": cursor}).data
+        self.assertEqual([(r["booking_id"], r["end_time"]) for r in changes["updated"]],
+                         [(booking["booking_id"], "10:00:00")])
+        self.assertEqual(changes["deleted"], [])
+        self.assertFalse(changes["has_more"])
+
+        owner.patch(url, {"end_time": "11:00"})
+        changes = owner.get("/api/reservations/changes/", {"since": changes["cursor"]}).data
+        self.assertEqual([r["end_time"] for r in changes["updated"]], ["11:00:00"])
+
+        owner.delete(url)
+        changes = owner.get("/api/reservations/changes/", {"since": changes["cursor"]}).data
+        self.assertEqual((changes["updated"], changes["deleted"]), ([], [booking["booking_id"]]))
+
+        self.assertEqual(owner.get("/api/reservations/changes/", {"since": "garbage"}).status_code, 400)
+
+    def test_reassigned_away_and_back_in_one_page(self):
+        staff, owner = self.client_for(self.staff), self.client_for(self.owner)
+        booking = self.book(staff)
+        cursor = owner.get("/api/reservations/changes/").data["cursor"]
+        url = f"/api/reservations/{booking['booking_id']}/"
+        staff.patch(url, {"user": self.other.pk})
+        staff.patch(url, {"user": self.owner.pk})
+
+        changes = owner.get("/api/reservations/changes/", {"since": cursor}).data
+        self.assertEqual([r["booking_id"] for r in changes["updated"]], [booking["booking_id"]])
+        self.assertEqual(changes["deleted"], [])
+
+
+class EventLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(room_name="Usage Room", capacity=4, location="Level 6", room_type="Huddle")
+        cls.other_room = Room.objects.create(room_name="Usage Room 2", capacity=4, location="Level 7", room_type="Huddle")
+        cls.user = User.objects.create(username="usage")
+
+    def book(self, start, end, status="Confirmed", room=None):
+        with transaction.atomic():
+            reservation = Reservation.objects.create(
+                room=room or self.room, user=self.user, date=date(2030, 1, 7),
+                start_time=time(start), end_time=time(end), status=status,
+            )
+            record_event(reservation, "created")
+        return reservation
+
+    def usage(self):
+        return {
+            (u.room_id, u.date.isoformat()): (u.bookings, u.booked_minutes)
+            for u in RoomDailyUsage.objects.all()
+        }
+
+    def test_usage_is_built_from_the_log(self):
+        consumer = CONSUMERS["room_daily_usage"]
+        first, second = self.book(9, 10), self.book(11, 13)
+        self.book(14, 15, status="Pending")
+        consume(consumer)
+        self.assertEqual(self.usage(), {(self.room.pk, "2030-01-07"): (2, 180)})
+
+        # Moved to another room, then cancelled
+        previous = snapshot(second)
+        second.room = self.other_room
+        second.save()
+        record_update(second, previous)
+        previous = snapshot(first)
+        first.status = "Cancelled"
+        first.save()
+        record_update(first, previous)
+        consume(consumer)
+        expected = {(self.other_room.pk, "2030-01-07"): (1, 120)}
+        self.assertEqual(self.usage(), expected)
+
+        # Replaying from scratch needs only the log, not the live rows
+        Reservation.objects.all().delete()
+        ReservationEvent.objects.filter(kind="deleted").delete()
+        consume(consumer, replay=True)
+        self.assertEqual(self.usage(), expected)
+
+    def test_reader_waits_at_recent_gaps(self):
+        first = self.book(9, 10)
+        event = ReservationEvent.objects.latest("id")
+        # A lower id still uncommitted elsewhere looks like a gap before this one
+        gap = ReservationEvent.objects.create(
+            id=event.id + 2, booking_id=first.pk, user_id=self.user.pk, room_id=self.room.pk, kind="updated",
+        )
+        self.assertEqual([e.id for e in events_after(event.id)], [])
+        self.assertEqual([e.id for e in events_after(event.id - 1)], [event.id])
+        # Once the gap is old it is a rolled-back insert and is skipped
+        later = timezone.now() + EVENT_GAP_TIMEOUT + timedelta(seconds=1)
+        self.assertEqual([e.id for e in events_after(event.id, now=later)], [gap.id])
+
+    def test_admin_writes_events(self):
+        self.client.force_login(User.objects.create_superuser(username="usage-admin", password="!"))
+        form = {"room": self.room.pk, "user": self.user.pk, "date": "2030-01-07",
+                "start_time": "09:00", "end_time": "10:00", "status": "Confirmed"}
+        response = self.client.post(reverse("admin:booking_reservation_add"), form)
+        self.assertEqual(response.status_code, 302)
+        reservation = Reservation.objects.get()
+        response = self.client.post(
+            reverse("admin:booking_reservation_change", args=[reservation.pk]),
+            {**form, "room": self.other_room.pk},
+        )
+        self.assertEqual(response.status_code, 302)
+        consume(CONSUMERS["room_daily_usage"])
+        self.assertEqual(self.usage(), {(self.other_room.pk, "2030-01-07"): (1, 60)})
+        self.client.post(reverse("admin:booking_reservation_delete", args=[reservation.pk]), {"post": "yes"})
+
+        events = ReservationEvent.objects.filter(booking_id=reservation.pk).order_by("id")
+        self.assertEqual([(e.kind, e.room_id, e.previous_room_id) for e in events], [
+            ("created", self.room.pk, None),
+            ("updated", self.other_room.pk, self.room.pk),
+            ("deleted", self.other_room.pk, None),
+        ])
+        consume(CONSUMERS["room_daily_usage"])
+        self.assertEqual(self.usage(), {})
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(room_name="Archive Room", capacity=4, location="Level 8", room_type="Huddle")
+        cls.user = User.objects.create_user(username="archived", password="Password-123")
+        cls.today = date.today()
+        cls.old = Reservation.objects.create(
+            room=cls.room, user=cls.user, date=cls.today - timedelta(days=400),
+            start_time=time(9), end_time=time(10), status="Confirmed",
+        )
+        cls.recent = Reservation.objects.create(
+            room=cls.room, user=cls.user, date=cls.today - timedelta(days=3),
+            start_time=time(9), end_time=time(10), status="Confirmed",
+        )
+
+    def test_archived_bookings_stay_listed(self):
+        tombstones, events = ReservationTombstone.objects.count(), ReservationEvent.objects.count()
+        self.assertEqual(archive_batch(self.today - timedelta(days=365)), 1)
+        # Archiving is not a deletion: nothing for sync clients or consumers to drop
+        self.assertEqual(ReservationTombstone.objects.count(), tombstones)
+        self.assertEqual(ReservationEvent.objects.count(), events)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        window = {"from": (self.today - timedelta(days=500)).isoformat(), "to": self.today.isoformat()}
+        for path in ("/api/reservations/", "/api/reservations/my/"):
+            rows = client.get(path, window).data
+            self.assertEqual([row["booking_id"] for row in rows], [self.old.pk, self.recent.pk])
+            self.assertEqual(rows[0]["room_name"], "Archive Room")
+            self.assertIsNone(rows[0]["version"])
+        # Windows after the archive horizon only read the live table
+        rows = client.get("/api/reservations/", {"from": (self.today - timedelta(days=10)).isoformat()}).data
+        self.assertEqual([row["booking_id"] for row in rows], [self.recent.pk])
+
+        self.client.force_login(self.user)
+        response = self.client.get("/booking/booking/manage_bookings/", {"from": window["from"]})
+        self.assertEqual([row["booking_id"] for row in response.context["archived"]], [self.old.pk])
+
+
+class BatchApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="batcher")
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_batch(self):
+        response = self.api.post("/api/batch/", {"requests": [
+            "/api/me/",
+            {"path": "/api/reservations/my/?from=2030-01-01"},
+            "/api/reservations/999999/",
+            "/api/reservations/calendar/not-a-token.ics",
+            "/api/batch/",
+        ]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        statuses = [item["status"] for item in response.data["responses"]]
+        self.assertEqual(statuses, [200, 200, 404, 400, 400])
+        self.assertEqual(response.data["responses"][0]["body"]["username"], "batcher")
+
+    def test_sub_requests_need_the_batch_user(self):
+        self.assertEqual(APIClient().post("/api/batch/", {"requests": ["/api/me/"]}, format="json").status_code, 401)
+
+
+class CascadeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(room_name="Busy Room", capacity=4, location="Level 9", room_type="Huddle")
+        cls.staff = User.objects.create(username="cascadestaff", is_staff=True)
+        cls.users = [User.objects.create(username=f"guest{i}", email=f"guest{i}@example.com") for i in range(3)]
+        tomorrow = date.today() + timedelta(days=1)
+        Reservation.objects.bulk_create([
+            Reservation(room=cls.room, user=user, date=tomorrow + timedelta(days=i),
+                        start_time=time(9), end_time=time(10), status="Confirmed")
+            for i, user in enumerate(cls.users)
+        ] + [
+            Reservation(room=cls.room, user=cls.users[0], date=date.today() - timedelta(days=30),
+                        start_time=time(9), end_time=time(10), status="Confirmed")
+        ])
+
+    def test_cancel_room_bookings(self):
+        api = APIClient()
+        api.force_authenticate(self.staff)
+        response = api.post(f"/api/rooms/{self.room.pk}/cancel-bookings/")
+        self.assertEqual(response.data, {"reservations": 3, "notified": 3})
+        self.assertEqual(Reservation.objects.filter(status="Cancelled").count(), 3)
+        self.assertEqual(ReservationEvent.objects.filter(kind="cancelled").count(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_cancel_reports_digests_sent(self):
+        with patch("booking.cascade.send_booking_email", side_effect=[None, ConnectionError("SMTP down"), None]), \
+                self.assertLogs("booking.cascade", "ERROR"):
+            result = cancel_reservations(self.room.bookings.all(), "Closed")
+        self.assertEqual(result, {"reservations": 4, "notified": 2})
+
+    def test_failed_digest_does_not_fail_the_delete(self):
+        sent = []
+
+        def flaky_send(email, *args, **kwargs):
+            if email == "guest0@example.com":
+                raise ConnectionError("SMTP down")
+            sent.append(email)
+
+        self.client.force_login(self.staff)
+        with patch("booking.cascade.send_booking_email", flaky_send), \
+                self.assertLogs("booking.cascade", "ERROR"), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(reverse("delete_room", args=[self.room.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            [str(m) for m in get_messages(response.wsgi_request)],
+            ["Room deleted successfully (4 reservations removed, cancellation emails queued for 3 users)."],
+        )
+        self.assertFalse(Room.objects.filter(pk=self.room.pk).exists())
+        self.assertEqual(ReservationTombstone.objects.filter(user_id__in=[u.pk for u in self.users]).count(), 4)
+        self.assertEqual(sorted(sent), ["guest1@example.com", "guest2@example.com"])
+
+
+class AvailabilityPublishTests(TestCase):
+    def test_superseded_files_outlive_cached_manifests(self):
+        room = Room.objects.create(room_name="Published", capacity=4, location="Level 10", room_type="Huddle")
+        day = date.today()
+        now = timezone.now()
+        with tempfile.TemporaryDirectory() as root:
+            publish(day, day, root, now=now)
+            manifest_path = Path(root, PUBLISH_DIR, MANIFEST_NAME)
+            old_name = json.loads(manifest_path.read_bytes())["days"][day.isoformat()]
+
+            Reservation.objects.create(room=room, user=User.objects.create(username="pub"), date=day,
+                                       start_time=time(9), end_time=time(10), status="Confirmed")
+            self.assertEqual(publish(day, day, root, now=now), (1, 0, 0))
+            manifest = json.loads(manifest_path.read_bytes())
+            self.assertNotEqual(manifest["days"][day.isoformat()], old_name)
+            # Clients may still hold the previous manifest for its max-age
+            self.assertTrue(Path(root, PUBLISH_DIR, old_name).exists())
+            self.assertIn(old_name, manifest["retired"])
+
+            later = now + timedelta(seconds=settings.AVAILABILITY_RETAIN_SECONDS)
+            publish(day, day, root, now=later)
+            self.assertFalse(Path(root, PUBLISH_DIR, old_name).exists())
+            self.assertEqual(json.loads(manifest_path.read_bytes())["retired"], {})
+
+
+class RoomSearchTests(TestCase):
+    def test_long_facility_entries_are_cut_to_fit(self):
+        api = APIClient()
+        api.force_authenticate(User.objects.create(username="roomstaff", is_staff=True))
+        long_entry = "Wall-mounted display " * 10
+        response = api.post("/api/rooms/", {
+            "room_name": "Long Facilities", "capacity": 6, "location": "Level 11",
+            "room_type": "Seminar", "facilities": f"Projector, {long_entry}",
+        })
+        self.assertEqual(response.status_code, 201)
+        tags = RoomFacility.objects.filter(room_id=response.data["room_id"]).values_list("name", flat=True)
+        self.assertEqual(max(len(tag) for tag in tags), RoomFacility._meta.get_field("name").max_length)
+        self.assertEqual(api.get("/api/rooms/", {"facilities": long_entry}).data[0]["room_name"], "Long Facilities")
+
+    def test_index_matches_substrings(self):
+        index = RoomSearchIndex([
+            (1, "Harbour View", "Level 2", "Projector, Whiteboard"),
+            (2, "Board Room", "Level 3", "Video conferencing"),
+        ])
+        self.assertEqual(index.search("board"), {1, 2})
+        self.assertEqual(index.search("proj"), {1})
+        self.assertEqual(index.search("view level"), {1})
+        self.assertEqual(index.search("ferenc"), {2})
+        self.assertEqual(index.search("boardroom"), set())
+
+
+class AuditOverlapsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        room = Room.objects.create(room_name="Audited", capacity=4, location="Level 12", room_type="Huddle")
+        user = User.objects.create(username="audited")
+        day = date(2030, 3, 4)
+        # bulk_create skips clean(), like the imports that let overlaps in
+        cls.first, cls.second, _, _ = Reservation.objects.bulk_create([
+            Reservation(room=room, user=user, date=day, start_time=time(9), end_time=time(11), status="Confirmed"),
+            Reservation(room=room, user=user, date=day, start_time=time(10), end_time=time(12), status="Confirmed"),
+            Reservation(room=room, user=user, date=day, start_time=time(12), end_time=time(13), status="Confirmed"),
+            Reservation(room=room, user=user, date=day, start_time=time(9), end_time=time(10), status="Cancelled"),
+        ])
+
+    def audit(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command("audit_overlaps", *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv(self):
+        out, err = self.audit("--from", "2030-03-01", "--to", "2030-03-31")
+        rows = list(csv.DictReader(StringIO(out)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual({rows[0]["booking_id"], rows[0]["other_booking_id"]}, {str(self.first.pk), str(self.second.pk)})
+        self.assertIn("1 overlapping pairs found.", err)
+
+    def test_json(self):
+        out, _ = self.audit("--format", "json")
+        self.assertEqual(len(json.loads(out)), 1)
+
+    def test_no_overlaps(self):
+        out, err = self.audit("--from", "2030-04-01", "--format", "json")
+        self.assertEqual(json.loads(out), [])
+        self.assertIn("0 overlapping pairs found.", err)
+
+
+@override_settings(HEALTHZ_TOKEN="probe-secret")
+class HealthzTests(TestCase):
+    def setUp(self):
+        patcher = patch("booking.views.warm_database", side_effect=OperationalError("could not connect to db.internal"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_anonymous_gets_no_details(self):
+        with patch("booking.views.warmup", return_value={}) as warmup:
+            response = self.client.get(reverse("healthz"), {"force": "1"})
+        warmup.assert_called_once_with(force=False)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["database"], {"ok": False})
+        self.assertNotIn(b"db.internal", response.content)
+
+    def test_wrong_token_is_anonymous(self):
+        response = self.client.get(reverse("healthz"), HTTP_X_HEALTHZ_TOKEN="guess")
+        self.assertNotIn(b"db.internal", response.content)
+
+    def test_token_holder_gets_details_and_force(self):
+        with patch("booking.views.warmup", return_value={}) as warmup:
+            response = self.client.get(reverse("healthz"), {"force": "1", "token": "probe-secret"})
+        warmup.assert_called_once_with(force=True)
+        self.assertIn("db.internal", response.json()["database"]["error"])
+
+    def test_staff_gets_details(self):
+        self.client.force_login(User.objects.create(username="ops", is_staff=True))
+        response = self.client.get(reverse("healthz"))
+        self.assertIn("db.internal", response.json()["database"]["error"])
+
+
+class FastListApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="fastrows")
+        room = Room.objects.create(room_name="Fast Room", capacity=4, location="Level 14", room_type="Huddle")
+        cls.reservation = Reservation.objects.create(
+            room=room, user=cls.user, date=date(2030, 6, 3), start_time=time(9), end_time=time(10),
+            status="Confirmed",
+        )
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def renderer(self, response):
+        return type(response.accepted_renderer)
+
+    def test_fast_lists_use_orjson_with_the_same_rows(self):
+        for url in ["/api/reservations/", "/api/reservations/my/", "/api/rooms/"]:
+            fast = self.api.get(url, {"fast": "1"})
+            slow = self.api.get(url)
+            self.assertIs(self.renderer(fast), ORJSONRenderer)
+            self.assertIs(self.renderer(slow), JSONRenderer)
+            self.assertEqual(fast.json(), slow.json())
+
+    def test_other_actions_keep_drf_renderer(self):
+        detail = self.api.get(f"/api/reservations/{self.reservation.pk}/", {"fast": "1"})
+        self.assertIs(self.renderer(detail), JSONRenderer)
+        create = self.api.post("/api/reservations/?fast=1", {
+            "room": self.reservation.room_id, "user": self.user.pk, "date": "2030-06-03",
+            "start_time": "11:00", "end_time": "12:00",
+        })
+        self.assertEqual(create.status_code, 201)
+        self.assertIs(self.renderer(create), JSONRenderer)
+
+
+class AllocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.day = date(2030, 9, 2)
+        cls.tiny, cls.huddle, cls.spare, cls.conference = Room.objects.bulk_create([
+            Room(room_name="Tiny", capacity=2, location="Level 15", room_type="Huddle", facilities="Whiteboard"),
+            Room(room_name="Huddle", capacity=4, location="Level 15", room_type="Huddle", facilities="Whiteboard"),
+            Room(room_name="Spare", capacity=4, location="Level 15", room_type="Huddle", facilities="Whiteboard"),
+            Room(room_name="Conference", capacity=6, location="Level 15", room_type="Conference",
+                 facilities="Projector"),
+        ])
+        user = User.objects.create(username="allocated")
+        Reservation.objects.bulk_create([
+            Reservation(room=room, user=user, date=cls.day, start_time=time(9), end_time=time(10), status="Confirmed")
+            for room in (cls.tiny, cls.spare)
+        ])
+
+    def request(self, id, attendees, start=9, **extra):
+        return {"id": id, "date": self.day, "start_time": time(start), "end_time": time(start + 1),
+                "attendees": attendees, **extra}
+
+    def rooms(self, plan):
+        return {item["id"]: item["room"] for item in plan["assignments"]}
+
+    def test_smallest_free_room_that_fits(self):
+        plan = allocate([self.request("free", 2, start=11), self.request("booked", 2), self.request("big", 5)])
+        self.assertEqual(self.rooms(plan), {
+            "free": self.tiny.pk, "booked": self.huddle.pk, "big": self.conference.pk,
+        })
+        self.assertEqual(plan["wasted_seats"], 0 + 2 + 1)
+
+    def test_type_and_facilities(self):
+        plan = allocate([
+            self.request("conference", 1, room_type="Conference"),
+            self.request("projector", 1, start=11, facilities=["projector"]),
+            self.request("none", 1, facilities=["Catering"]),
+        ])
+        self.assertEqual(self.rooms(plan), {"conference": self.conference.pk, "projector": self.conference.pk})
+        self.assertEqual(plan["unassigned"], [
+            {"id": "none", "reason": "No room matches the headcount, type and facilities."},
+        ])
+
+    def test_displaces_a_placed_request(self):
+        # "wide" goes first (more attendees) and takes Huddle, the only free
+        # whiteboard room; "whiteboard" then moves it on to Conference
+        requests = [self.request("wide", 4), self.request("whiteboard", 2, facilities=["whiteboard"])]
+        self.assertEqual(self.rooms(allocate(requests)), {"wide": self.conference.pk, "whiteboard": self.huddle.pk})
+
+        with patch("booking.allocation.DISPLACEMENT_BUDGET", 0):
+            plan = allocate(requests)
+        self.assertEqual(self.rooms(plan), {"wide": self.huddle.pk})
+        self.assertEqual(plan["unassigned"], [{"id": "whiteboard", "reason": "Every matching room is booked at that time."}])
+
+    def test_thousand_requests_across_hundred_rooms(self):
+        Room.objects.all().delete()
+        Room.objects.bulk_create(benchmark_rooms(100))
+        requests = benchmark_requests(1000, 100)
+        start = perf_counter()
+        plan = allocate(requests)
+        self.assertLess(perf_counter() - start, 1)
+
+        self.assertEqual(len(plan["assignments"]) + len(plan["unassigned"]), 1000)
+        crowded = [item for item in plan["assignments"] if item["id"].startswith("crowded-")]
+        self.assertEqual(len(crowded), 100)
+        taken = {}
+        for item in plan["assignments"]:
+            slots = taken.setdefault(item["room"], [])
+            self.assertFalse([s for s in slots if s[0] < item["end_time"] and item["start_time"] < s[1]])
+            slots.append((item["start_time"], item["end_time"]))
+
+
+@override_settings(PBKDF2_ITERATIONS=1000)
+class ImportUsersTests(TestCase):
+    PASSWORD = "Lantern-Harbour-73"
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create(username="existing")
+
+    def csv(self, *rows):
+        return ["username,email,first_name,last_name,phone,password,is_staff\n"] + [row + "\n" for row in rows]
+
+    def failures(self, result):
+        return {failure["line"]: sorted(failure["errors"]) for failure in result["failed"]}
+
+    def test_creates_users_profiles_and_invites(self):
+        result = import_users(self.csv(
+            f"ana,ana@example.com,Ana,Ng,021 555,{self.PASSWORD},yes",
+            "ben,,,,,,",
+        ))
+        self.assertEqual((result["processed"], result["created"], result["failed"]), (2, 2, []))
+        ana, ben = User.objects.get(username="ana"), User.objects.get(username="ben")
+        self.assertTrue(ana.is_staff)
+        self.assertTrue(ana.check_password(self.PASSWORD))
+        self.assertEqual(ana.profile.phone, "021 555")
+        self.assertFalse(ben.has_usable_password())
+        [invite] = result["invites"]
+        self.assertEqual(invite["username"], "ben")
+        self.assertTrue(default_token_generator.check_token(ben, invite["token"]))
+
+    def test_duplicate_usernames_within_and_across_chunks(self):
+        result = import_users(self.csv("cat,,,,,,", "cat,,,,,,", "dan,,,,,,", "cat,,,,,,", "existing,,,,,,"),
+                              chunk_size=2)
+        self.assertEqual(result["created"], 2)
+        self.assertEqual(self.failures(result), {3: ["username"], 5: ["username"], 6: ["username"]})
+
+    def test_invalid_rows(self):
+        result = import_users(self.csv(
+            "bad name!,,,,,,",
+            ",,,,,,",
+            "eve,not-an-email,,,,,",
+            f"fay,,{'F' * 151},{'L' * 151},,,",
+            f"gus,{'g' * 250}@example.com,,,{'9' * 21},,",
+            "hal,,,,,password,",
+            f"{'i' * 151},,,,,,",
+        ))
+        self.assertEqual(result["created"], 0)
+        self.assertEqual(self.failures(result), {
+            2: ["username"], 3: ["username"], 4: ["email"], 5: ["first_name", "last_name"],
+            6: ["email", "phone"], 7: ["password"], 8: ["username"],
+        })
+
+    def test_database_error_fails_only_its_chunk(self):
+        bulk_create = User.objects.bulk_create
+
+        def fail_second_chunk(users, *args, **kwargs):
+            if users[0].username == "kim":
+                raise DataError("value too long for type character varying(150)")
+            return bulk_create(users, *args, **kwargs)
+
+        with patch.object(User.objects, "bulk_create", side_effect=fail_second_chunk):
+            result = import_users(self.csv("jay,,,,,,", "kim,,,,,,", "lou,,,,,,"), chunk_size=1)
+        self.assertEqual(result["created"], 2)
+        self.assertEqual([failure["username"] for failure in result["failed"]], ["kim"])
+        self.assertFalse(User.objects.filter(username="kim").exists())
+        self.assertFalse(Profile.objects.filter(user__username="kim").exists())
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source, invites = Path(tmp, "users.csv"), Path(tmp, "invites.csv")
+            source.write_text("".join(self.csv("max,,,,,,", "existing,,,,,,")))
+            out, err = StringIO(), StringIO()
+            call_command("import_users", source, "--invites-out", invites, stdout=out, stderr=err)
+            self.assertEqual([row["username"] for row in csv.DictReader(invites.open())], ["max"])
+        self.assertIn("Created 1 users (1 invites), 1 rows failed.", out.getvalue())
+        self.assertIn("Line 3 (existing): username: A user with that username already exists.", err.getvalue())
+
+    def test_bulk_endpoint(self):
+        api = APIClient()
+        upload = SimpleUploadedFile("users.csv", "".join(self.csv("ned,,,,,,", "ned,,,,,,")).encode())
+        api.force_authenticate(User.objects.get(username="existing"))
+        self.assertEqual(api.post("/api/users/bulk/", {"file": upload}).status_code, 403)
+
+        api.force_authenticate(User.objects.create(username="importer", is_staff=True))
+        upload.seek(0)
+        response = api.post("/api/users/bulk/", {"file": upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data["created"], len(response.data["failed"])), (1, 1))
+
+
+@override_settings(PBKDF2_ITERATIONS=1000, ARGON2_TIME_COST=1, ARGON2_MEMORY_COST=8, ARGON2_PARALLELISM=1)
+class PasswordUpgradeTests(TestCase):
+    PASSWORD = "Lantern-Harbour-73"
+
+    def test_token_login_rehashes_with_current_policy(self):
+        stored = {"old iterations": lambda: make_password(self.PASSWORD, hasher=TunedPBKDF2PasswordHasher()),
+                  "pbkdf2_sha1": lambda: make_password(self.PASSWORD, hasher="pbkdf2_sha1")}
+        if find_spec("argon2"):
+            stored["argon2"] = lambda: make_password(self.PASSWORD, hasher="argon2")
+        for name, encode in stored.items():
+            with self.subTest(name):
+                with override_settings(PBKDF2_ITERATIONS=500):
+                    user = User.objects.create(username=name.replace(" ", "_"), password=encode())
+                response = APIClient().post(
+                    reverse("token_obtain_pair"), {"username": user.username, "password": self.PASSWORD}
+                )
+                self.assertEqual(response.status_code, 200)
+                user.refresh_from_db()
+                self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+                self.assertTrue(user.check_password(self.PASSWORD))
+
+
+class ReservationVersionTests(TestCase):
+    """Optimistic locking: Reservation.version, If-Match/ETag and the edit forms."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = Room.objects.create(room_name="Versioned", capacity=4, location="Level 16", room_type="Huddle")
+        cls.user = User.objects.create(username="versioned")
+        cls.staff = User.objects.create(username="versioned-staff", is_staff=True)
+        cls.day = date.today() + timedelta(days=3)
+
+    def setUp(self):
+        self.reservation = Reservation.objects.create(
+            room=self.room, user=self.user, date=self.day, start_time=time(9), end_time=time(10),
+            status="Confirmed",
+        )
+        self.url = f"/api/reservations/{self.reservation.pk}/"
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def bump(self, *args, **kwargs):
+        Reservation.objects.filter(pk=self.reservation.pk).update(version=F("version") + 1)
+
+    def test_stale_save_raises(self):
+        first, second = Reservation.objects.get(pk=self.reservation.pk), Reservation.objects.get(pk=self.reservation.pk)
+        first.end_time = time(11)
+        first.save()
+        self.assertEqual(first.version, 2)
+        second.status = "Cancelled"
+        with self.assertRaises(StaleReservationError), transaction.atomic():
+            second.save()
+        self.assertEqual(second.version, 1)
+        self.assertEqual(Reservation.objects.get(pk=self.reservation.pk).status, "Confirmed")
+
+    def test_etag_and_if_match(self):
+        response = self.api.get(self.url)
+        self.assertEqual(response["ETag"], '"1"')
+
+        for if_match in ['"2"', "garbage"]:
+            response = self.api.patch(self.url, {"end_time": "11:00"}, HTTP_IF_MATCH=if_match)
+            self.assertEqual(response.status_code, 412)
+
+        response = self.api.patch(self.url, {"end_time": "11:00"}, HTTP_IF_MATCH='W/"1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"2"')
+
+    def test_lost_race(self):
+        # Someone else saves between our read and our UPDATE
+        with patch("booking.api_views.lock_slot", side_effect=self.bump):
+            self.assertEqual(self.api.patch(self.url, {"end_time": "11:00"}).status_code, 409)
+            self.assertEqual(
+                self.api.patch(self.url, {"end_time": "11:00"}, HTTP_IF_MATCH='"2"').status_code, 412
+            )
+        self.assertEqual(Reservation.objects.get(pk=self.reservation.pk).end_time, time(10))
+
+    def test_destroy_checks_if_match(self):
+        self.bump()
+        self.assertEqual(self.api.delete(self.url, HTTP_IF_MATCH='"1"').status_code, 412)
+        self.assertTrue(Reservation.objects.filter(pk=self.reservation.pk).exists())
+        self.assertEqual(self.api.delete(self.url, HTTP_IF_MATCH='"2"').status_code, 204)
+        self.assertFalse(Reservation.objects.filter(pk=self.reservation.pk).exists())
+
+    def test_stale_edit_forms(self):
+        form = {"room": self.room.pk, "date": self.day.isoformat(), "start_time": "09:00", "end_time": "11:00",
+                "user": self.user.pk, "status": "Confirmed", "version": 1}
+        for user, name in [(self.user, "edit_booking"), (self.staff, "edit_reservation")]:
+            self.client.force_login(user)
+            url = reverse(name, args=[self.reservation.pk])
+            self.assertContains(self.client.get(url), 'name="version"')
+            self.bump()
+            response = self.client.post(url, form, follow=True)
+            self.assertRedirects(response, url)
+            self.assertContains(response, STALE_EDIT_MESSAGE)
+            self.assertEqual(Reservation.objects.get(pk=self.reservation.pk).end_time, time(10))
+
+
+class FakeBrotli:
+    """Stands in for the optional brotli package."""
+
+    @staticmethod
+    def compress(content, quality):
+        return b"br:" + gzip.compress(content)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200, COMPRESSION_STREAM_CHUNK=1000)
+class CompressionMiddlewareTests(TestCase):
+    body = json.dumps([{"room": "Compressed Room", "level": i} for i in range(50)]).encode()
+
+    def respond(self, response, accept="gzip, deflate, br"):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, body=None, **headers):
+        return HttpResponse(self.body if body is None else body, content_type="application/json", headers=headers)
+
+    def test_small_and_excluded_responses_pass_through(self):
+        for response in [self.json_response(b"[]"), HttpResponse(self.body, content_type="image/png")]:
+            response = self.respond(response)
+            self.assertFalse(response.has_header("Content-Encoding"))
+            self.assertFalse(response.has_header("Vary"))
+
+    def test_gzip(self):
+        response = self.respond(self.json_response())
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_q_zero_refuses_a_coding(self):
+        self.assertEqual(accepted_encodings("gzip;q=0, br;q=0.0, deflate;q=0.5, identity"), {"deflate", "identity"})
+        response = self.respond(self.json_response(), accept="gzip;q=0, deflate")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(self.respond(self.json_response(), accept="gzip;q=0.5")["Content-Encoding"], "gzip")
+
+    def test_streaming_is_coalesced(self):
+        lines = [b"BEGIN:VEVENT\r\nEND:VEVENT\r\n"] * 200
+        response = StreamingHttpResponse(iter(lines), content_type="text/calendar", headers={"Content-Length": "1"})
+        response = self.respond(response)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        chunks = list(response.streaming_content)
+        # 200 tiny chunks regrouped into COMPRESSION_STREAM_CHUNK pieces (plus the gzip header/trailer)
+        self.assertLess(len(chunks), 20)
+        self.assertEqual(gzip.decompress(b"".join(chunks)), b"".join(lines))
+
+    @patch("booking.middleware.brotli", FakeBrotli)
+    def test_html_is_always_gzip(self):
+        self.assertEqual(self.respond(self.json_response())["Content-Encoding"], "br")
+        html = HttpResponse(b"<p>csrf</p>" * 100, content_type="text/html; charset=utf-8")
+        self.assertEqual(self.respond(html)["Content-Encoding"], "gzip")
+
+    def test_strong_etag_becomes_weak(self):
+        self.assertEqual(self.respond(self.json_response(ETag='"v3"'))["ETag"], 'W/"v3"')
+        self.assertEqual(self.respond(self.json_response(ETag='W/"v3"'))["ETag"], 'W/"v3"')
+        self.assertEqual(self.respond(self.json_response(ETag='"v3"'), accept="")["ETag"], '"v3"')
+
+
+class SessionStrategyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="sessions")
+
+    def session_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse("manage_bookings")).status_code, 200)
+        return [query["sql"] for query in queries if "django_session" in query["sql"]]
+
+    def test_engines(self):
+        for strategy, engine in settings.SESSION_ENGINES.items():
+            with self.subTest(strategy), override_settings(SESSION_ENGINE=engine):
+                cache.clear()
+                Session.objects.all().delete()
+                self.client = Client()
+                self.client.force_login(self.user)
+                self.session_queries()
+                stored = {"db": 1, "cached_db": 1, "signed_cookies": 0}[strategy]
+                self.assertEqual(Session.objects.count(), stored)
+                # Only the plain DB engine reads its row back on every request
+                self.assertEqual(bool(self.session_queries()), strategy == "db")
+
+    def test_unknown_strategy(self):
+        with patch.dict("os.environ", {"SESSION_STRATEGY": "redis"}), self.assertRaises(ImproperlyConfigured):
+            runpy.run_path(str(Path(settings.BASE_DIR) / "BookingSystem" / "settings.py"))
+
+    def test_sweep_sessions(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f"expired{i}", session_data="", expire_date=now - timedelta(hours=1)) for i in range(3)]
+            + [Session(session_key="live", session_data="", expire_date=now + timedelta(hours=1))]
+        )
+        out = StringIO()
+        call_command("sweep_sessions", "--batch-size", "2", stdout=out)
+        self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), ["live"])
+        self.assertIn("Deleted 2 expired sessions so far...", out.getvalue())
+        self.assertIn("Deleted 3 expired sessions.", out.getvalue())
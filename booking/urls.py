@@ -30,5 +30,7 @@ urlpatterns = [
     path("booking/add_reservation/", views.add_reservation, name="add_reservation"),
     path("booking/edit_reservation/<int:booking_id>/", views.edit_reservation, name="edit_reservation"),
     path("booking/delete_reservation/<int:booking_id>/", views.delete_reservation, name="delete_reservation"),
+    path("booking/lookup/users/", views.lookup_users, name="lookup_users"),
+    path("booking/lookup/rooms/", views.lookup_rooms, name="lookup_rooms"),
 
 ]
\ No newline at end of file
@@ -4,13 +4,14 @@ from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 
-def send_booking_email(user_email, subject, template_name, context):
+def send_booking_email(user_email, subject, template_name, context, connection=None):
     """
     Sends an email using a template (HTML + text) for booking notifications.
     `template_name` is base name (without extension), so you must have
        templates/emails/<template_name>.html
        templates/emails/<template_name>.txt
     `context` is a dict you pass to render templates.
+    Pass an open mail `connection` to reuse it across several emails.
     """
     # Render text and html versions
     text_body = render_to_string(f"emails/{template_name}.txt", context)
@@ -21,6 +22,25 @@ def send_booking_email(user_email, subject, template_name, context):
         body=text_body,
         from_email=settings.DEFAULT_FROM_EMAIL,
         to=[user_email],
+        connection=connection,
     )
     msg.attach_alternative(html_body, "text/html")
     msg.send()
+
+
+# Length of RoomFacility.name; longer tags are cut to fit
+FACILITY_NAME_MAX_LENGTH = 100
+
+
+def parse_facilities(value):
+    """
+    Normalised facility tags from Room.facilities-style text ("Projector,
+    Whiteboard") or a list of names: lowercase, trimmed, empty ones dropped,
+    at most FACILITY_NAME_MAX_LENGTH characters.
+    """
+    if isinstance(value, str):
+        value = value.split(",")
+    return {
+        " ".join(name.split()).lower()[:FACILITY_NAME_MAX_LENGTH].rstrip()
+        for name in value if name and name.strip()
+    }
@@ -6,12 +6,55 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .forms import ReservationForm
-from .models import Room, Reservation, Profile
+from .models import Room, Reservation, Profile, StaleReservationError
 from .forms import SignUpForm
 from .utils import send_booking_email
 from .models import Room
 from django import forms
 from .forms import AdminReservationForm
+from .db_routers import use_replica
+from .events import record_event, record_update, snapshot
+from django.db import transaction
+from django.db.models import Q
+from django.http import JsonResponse
+from django.core.paginator import Paginator
+from django.views.decorators.cache import never_cache
+from .warmup import run_stage, warm_database, warmup
+from .cascade import delete_with_reservations
+from .archive import archive_horizon, archived_between
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+
+STALE_EDIT_MESSAGE = (
+    "Someone else changed this reservation while you were editing it. "
+    "The latest version is shown below; please make your changes again."
+)
+
+
+def healthz_trusted(request):
+    if request.user.is_staff:
+        return True
+    token = request.headers.get("X-Healthz-Token") or request.GET.get("token", "")
+    return bool(settings.HEALTHZ_TOKEN) and constant_time_compare(token, settings.HEALTHZ_TOKEN)
+
+
+# Readiness probe: warms the instance on first hit, then re-checks the DB.
+# Error text and ?force=1 (re-run every stage) are for staff and token holders only.
+@never_cache
+def healthz(request):
+    trusted = healthz_trusted(request)
+    stages = warmup(force=trusted and request.GET.get("force") == "1")
+    database = run_stage("database", warm_database)
+    ready = database["ok"] and all(stage["ok"] for stage in stages.values())
+    if not trusted:
+        stages = {name: {"ok": stage["ok"]} for name, stage in stages.items()}
+        database = {"ok": database["ok"]}
+    return JsonResponse(
+        {"status": "ok" if ready else "unavailable", "warmup": stages, "database": database},
+        status=200 if ready else 503,
+    )
 
 
 # index (homepage)
@@ -53,29 +96,83 @@ def logout_view(request):
 
 
 # list all rooms
+@use_replica
 def available_rooms(request):
     rooms = Room.objects.all()
     return render(request, "booking/rooms.html", {"rooms": rooms})
 
+# Autocomplete lookups for booking/widgets.py (prefix match, indexed on Postgres)
+@staff_member_required
+@use_replica
+def lookup_users(request):
+    term = request.GET.get("q", "").strip()
+    users = []
+    if term:
+        users = (
+            User.objects
+            .filter(Q(username__istartswith=term) | Q(email__istartswith=term))
+            .order_by("username")
+            .values_list("id", "username")[:settings.AUTOCOMPLETE_LIMIT]
+        )
+    return JsonResponse({"results": [{"id": pk, "text": username} for pk, username in users]})
+
+
+@login_required(login_url="login")
+@use_replica
+def lookup_rooms(request):
+    term = request.GET.get("q", "").strip()
+    rooms = []
+    if term:
+        rooms = (
+            Room.objects
+            .filter(Q(room_name__istartswith=term) | Q(location__istartswith=term))
+            .order_by("room_name")
+            .only("room_id", "location")[:settings.AUTOCOMPLETE_LIMIT]
+        )
+    return JsonResponse({"results": [{"id": room.room_id, "text": str(room)} for room in rooms]})
+
+
 #Manage Booking (Admin and Users)
 @login_required(login_url="login")
+@use_replica
 def manage_bookings(request):
-    # 👇 Admins can see ALL reservations
-    if request.user.is_staff:
-        user_reservations = Reservation.objects.select_related("room", "user").order_by("date", "start_time")
-    else:
-        # 👇 Regular users only see their own
-        user_reservations = Reservation.objects.filter(user=request.user).select_related("room").order_by("date", "start_time")
-
-    return render(request, "booking/manage_bookings.html", {"reservations": user_reservations})
+    # 👇 Admins can see ALL reservations, regular users only their own
+    user_reservations = Reservation.objects.listing(None if request.user.is_staff else request.user)
+
+    # Past bookings moved to the archive, for ?from=YYYY-MM-DD[&to=YYYY-MM-DD]
+    try:
+        history_from = parse_date(request.GET.get("from") or "")
+        history_to = parse_date(request.GET.get("to") or "") or timezone.localdate()
+    except ValueError:  # well-formed but impossible dates
+        history_from, history_to = None, timezone.localdate()
+    horizon = archive_horizon()
+    archived = []
+    if history_from and horizon and history_from <= horizon:
+        filters = {} if request.user.is_staff else {"user_id": request.user.id}
+        archived = archived_between(history_from, history_to, **filters).order_by("date", "start_time")
+
+    return render(request, "booking/manage_bookings.html", {
+        "reservations": user_reservations,
+        "archived": archived,
+        "history_from": history_from,
+        "history_to": history_to,
+        "archive_horizon": horizon,
+    })
 
 @login_required
 def edit_booking(request, booking_id):
     reservation = get_object_or_404(Reservation, pk=booking_id, user=request.user)
     if request.method == "POST":
+        previous = snapshot(reservation)
         form = ReservationForm(request.POST, instance=reservation)
         if form.is_valid():
-            form.save()
+            try:
+                with transaction.atomic():
+                    form.save()
+                    record_update(reservation, previous)
+            except StaleReservationError:
+                messages.error(request, STALE_EDIT_MESSAGE)
+                return redirect("edit_booking", booking_id=booking_id)
             messages.success(request, "Reservation updated successfully!")
             return redirect("manage_bookings")
     else:
@@ -89,8 +186,15 @@ def cancel_booking(request, booking_id):
     else:
         reservation = get_object_or_404(Reservation, pk=booking_id, user=request.user)
 
+    previous = snapshot(reservation)
     reservation.status = "Cancelled"
-    reservation.save()
+    try:
+        with transaction.atomic():
+            reservation.save()
+            record_update(reservation, previous)
+    except StaleReservationError:
+        messages.error(request, STALE_EDIT_MESSAGE)
+        return redirect("manage_bookings")
 
     # Email user
     subject = "Your Reservation Cancelled"
@@ -126,7 +230,9 @@ def make_reservation(request):
                 reservation.user = request.user
 
             reservation.status = "Confirmed"
-            reservation.save()
+            with transaction.atomic():
+                reservation.save()
+                record_event(reservation, "created")
 
             # Send confirmation email
             subject = "Your Reservation Confirmation"
@@ -163,9 +269,10 @@ def cancellation_success(request):
 #Admin functions only
 
 @staff_member_required
+@use_replica
 def manage_users(request):
-    users = User.objects.all()
-    return render(request, "booking/manage_users.html", {"users": users})
+    page = Paginator(User.objects.order_by("username"), 50).get_page(request.GET.get("page"))
+    return render(request, "booking/manage_users.html", {"users": page, "page_obj": page})
 
 @staff_member_required
 def add_user(request):
@@ -208,8 +315,11 @@ def delete_user(request, user_id):
     if user.is_superuser:
         messages.error(request, "You cannot delete another admin.")
     else:
-        user.delete()
-        messages.success(request, "User deleted successfully.")
+        result = delete_with_reservations(user, "the account they belonged to was removed")
+        messages.success(
+            request,
+            f"User deleted successfully ({result['reservations']} reservations removed).",
+        )
     return redirect("manage_users")
 
 
@@ -222,6 +332,7 @@ class RoomForm(forms.ModelForm):
 
 # --- Manage Rooms View ---
 @staff_member_required
+@use_replica
 def manage_rooms(request):
     rooms = Room.objects.all()
     return render(request, "booking/manage_rooms.html", {"rooms": rooms})
@@ -256,16 +367,21 @@ def edit_room(request, room_id):
 
 @staff_member_required
 def delete_room(request, room_id):
-    room = get_object_or_404(Room, id=room_id)
-    room.delete()
-    messages.success(request, "Room deleted successfully.")
+    room = get_object_or_404(Room, pk=room_id)
+    result = delete_with_reservations(room, f"{room.room_name} is no longer available")
+    messages.success(
+        request,
+        f"Room deleted successfully ({result['reservations']} reservations removed, "
+        f"cancellation emails queued for {result['queued']} users).",
+    )
     return redirect("manage_rooms")
 
 #manage reservation
 
 @staff_member_required
+@use_replica
 def manage_reservations(request):
-    reservations = Reservation.objects.all().order_by("date", "start_time")
+    reservations = Reservation.objects.listing()
     return render(request, "booking/manage_reservations.html", {"reservations": reservations})
 
 
@@ -274,7 +390,9 @@ def add_reservation(request):
     if request.method == "POST":
         form = AdminReservationForm(request.POST)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                reservation = form.save()
+                record_event(reservation, "created")
             messages.success(request, "Reservation added successfully.")
             return redirect("manage_reservations")
     else:
@@ -286,9 +404,16 @@ def add_reservation(request):
 def edit_reservation(request, booking_id):
     reservation = get_object_or_404(Reservation, pk=booking_id)
     if request.method == "POST":
+        previous = snapshot(reservation)
         form = AdminReservationForm(request.POST, instance=reservation)
         if form.is_valid():
-            form.save()
+            try:
+                with transaction.atomic():
+                    form.save()
+                    record_update(reservation, previous)
+            except StaleReservationError:
+                messages.error(request, STALE_EDIT_MESSAGE)
+                return redirect("edit_reservation", booking_id=booking_id)
             messages.success(request, "Reservation updated successfully.")
             return redirect("manage_reservations")
     else:
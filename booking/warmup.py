@@ -0,0 +1,76 @@
+# booking/warmup.py
+
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+from .db_routers import REPLICA
+
+# Template folders compiled ahead of the first request (relative to templates/)
+WARM_TEMPLATE_DIRS = ["booking", "emails"]
+
+_warmed = {}
+
+
+def warm_database():
+    """Opens the connection(s) and runs a trivial query on each."""
+    aliases = [alias for alias in ("default", REPLICA) if alias in settings.DATABASES]
+    for alias in aliases:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+    return {"databases": aliases}
+
+
+def warm_urls():
+    """Populates the URL resolver, including booking.urls and the API router."""
+    resolver = get_resolver()
+    resolver.reverse_dict  # populates every included urlconf
+    patterns = 0
+    for include in resolver.url_patterns:
+        patterns += len(getattr(include, "url_patterns", [include]))
+    return {"patterns": patterns}
+
+
+def warm_templates():
+    """Loads (and, with the cached loader, keeps compiled) every page and email template."""
+    compiled = 0
+    root = Path(settings.BASE_DIR) / "templates"
+    for folder in WARM_TEMPLATE_DIRS:
+        for path in sorted((root / folder).rglob("*")):
+            if path.suffix in (".html", ".txt"):
+                get_template(path.relative_to(root).as_posix())
+                compiled += 1
+    return {"templates": compiled}
+
+
+STAGES = [
+    ("database", warm_database),
+    ("urls", warm_urls),
+    ("templates", warm_templates),
+]
+
+
+def run_stage(name, func):
+    started = time.perf_counter()
+    try:
+        result = {"ok": True, **func()}
+    except Exception as exc:
+        result = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+    result["ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def warmup(force=False):
+    """
+    Runs each warmup stage once per process (again with `force`) and returns
+    {stage: {"ok", "ms", ...}} with the timings of the run that did the work.
+    A failed stage is retried on the next call.
+    """
+    for name, func in STAGES:
+        if force or not _warmed.get(name, {}).get("ok"):
+            _warmed[name] = run_stage(name, func)
+    return dict(_warmed)
@@ -0,0 +1,50 @@
+# booking/widgets.py
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from django.utils.html import format_html
+
+
+class AutocompleteInput(forms.TextInput):
+    """
+    Object id input for a ModelChoiceField, with the selected object's label
+    shown next to it; this is all that works without JavaScript.
+    booking/js/autocomplete.js swaps it for a search box and <select> filled
+    from the JSON lookup view named by `url_name` ({"results": [{"id", "text"}]}).
+    """
+
+    class Media:
+        js = ["booking/js/autocomplete.js"]
+
+    def __init__(self, url_name, attrs=None):
+        super().__init__({"inputmode": "numeric", "placeholder": "ID", **(attrs or {})})
+        self.url_name = url_name
+        self.choices = None  # set by ModelChoiceField
+
+    def selected_label(self, value):
+        if value in ("", None) or self.choices is None:
+            return ""
+        try:
+            obj = self.choices.queryset.filter(pk=value).first()
+        except (ValueError, TypeError, ValidationError):
+            return ""  # bad POSTed value; the field reports the error
+        return self.choices.field.label_from_instance(obj) if obj else ""
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["selected_label"] = self.selected_label(value)
+        context["widget"]["attrs"].update({
+            "data-autocomplete-url": reverse(self.url_name),
+            "data-autocomplete-label": context["selected_label"],
+            "data-autocomplete-empty": (self.choices and self.choices.field.empty_label) or "",
+        })
+        return context
+
+    def render(self, name, value, attrs=None, renderer=None):
+        context = self.get_context(name, value, attrs)
+        html = self._render(self.template_name, context, renderer)
+        if context["selected_label"]:
+            html += format_html(' <span class="form-text" data-autocomplete-selected>{}</span>',
+                                context["selected_label"])
+        return html